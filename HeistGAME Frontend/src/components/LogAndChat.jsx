@@ -1,6 +1,7 @@
 import React, { useEffect, useRef, useContext } from 'react';
 import ChatInput from './ChatInput';
 import { GameContext } from '../contexts/GameContext';
+import { formatLogEntry, logEntryTime } from '../services/gameLog';
 
 const LogAndChat = () => {
   const logEndRef = useRef(null);
@@ -12,9 +13,13 @@ const LogAndChat = () => {
 
   // Combine and sort logs and chat messages by their timestamp
   const combinedFeed = [
-    ...log.map(entry => ({ ...entry, type: 'log' })),
-    ...chatHistory.map(entry => ({ ...entry, type: 'chat' }))
-  ].sort((a, b) => new Date(a.timestamp) - new Date(b.timestamp));
+    ...log.map(entry => ({
+      type: 'log',
+      message: formatLogEntry(entry, gameState),
+      time: logEntryTime(entry, gameState),
+    })),
+    ...chatHistory.map(entry => ({ ...entry, type: 'chat', time: new Date(entry.timestamp).getTime() }))
+  ].sort((a, b) => a.time - b.time);
 
   useEffect(() => {
     logEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -0,0 +1,77 @@
+// Game log entries arrive as compact events (see LogEntry in game_models.py):
+//   t: milliseconds since the game's createdAt
+//   e: the event code, one of LogEvent below
+//   p: players, as indexes into playerOrder; -1, -2, ... refer to x[0], x[1], ...
+//   n: numbers (vote counts, mission number and fail cards)
+//   x: display names of players who are no longer in playerOrder
+
+// Mirrors LogEvent in game_models.py.
+export const LogEvent = Object.freeze({
+  GAME_CREATED: 1,
+  PLAYER_JOINED: 2,
+  PLAYER_LEFT: 3,
+  PLAYER_KICKED: 4,
+  BOT_TOOK_SEAT: 5,
+  SEAT_RECLAIMED: 6,
+  HOST_LEFT: 7,
+  TOO_FEW_PLAYERS: 8,
+  GAME_STARTED: 9,
+  AGENTS_REVEALED: 10,
+  TEAM_PROPOSED: 11,
+  TEAM_APPROVED: 12,
+  TEAM_REJECTED: 13,
+  FIFTH_REJECTION: 14,
+  MISSION_ABORTED: 15,
+  MASTERMIND_OFFLINE: 16,
+  MISSION_SUCCEEDED: 17,
+  MISSION_FAILED: 18,
+  THIEVES_WIN: 19,
+  AGENTS_WIN: 20,
+  GAME_RESET: 21,
+});
+
+const playerName = (entry, gameState, seat) => {
+  if (seat < 0) {
+    return entry.x?.[-seat - 1] ?? 'Someone';
+  }
+  const playerId = gameState.playerOrder?.[seat];
+  return gameState.players?.[playerId]?.displayName ?? 'Someone';
+};
+
+const MESSAGES = {
+  [LogEvent.GAME_CREATED]: ([host]) => `Game created by ${host}.`,
+  [LogEvent.PLAYER_JOINED]: ([player]) => `${player} has joined the game.`,
+  [LogEvent.PLAYER_LEFT]: ([player]) => `${player} has left the game.`,
+  [LogEvent.PLAYER_KICKED]: ([player]) => `${player} was kicked by the host.`,
+  [LogEvent.BOT_TOOK_SEAT]: ([player]) => `${player} has disconnected. A bot has taken over their seat.`,
+  [LogEvent.SEAT_RECLAIMED]: ([player]) => `${player} has reconnected and taken back their seat.`,
+  [LogEvent.HOST_LEFT]: () => 'The host has left. The game has been terminated.',
+  [LogEvent.TOO_FEW_PLAYERS]: () => 'Not enough players to continue. The game has been terminated.',
+  [LogEvent.GAME_STARTED]: () => 'The game has started! Assigning roles...',
+  [LogEvent.AGENTS_REVEALED]: ([mastermind]) => `Agents have been revealed. The first Mastermind is ${mastermind}.`,
+  [LogEvent.TEAM_PROPOSED]: ([proposer, ...team]) => `${proposer} proposed a team: ${team.join(', ')}.`,
+  [LogEvent.TEAM_APPROVED]: (_, [approve, reject]) => `Team approved (${approve}-${reject}). Mission starting.`,
+  [LogEvent.TEAM_REJECTED]: ([mastermind], [approve, reject]) =>
+    `Team rejected (${approve}-${reject}). New mastermind is ${mastermind}.`,
+  [LogEvent.FIFTH_REJECTION]: () => 'Team rejected 5 times in a row. Agents win!',
+  [LogEvent.MISSION_ABORTED]: () => 'Mission aborted because a team member went offline.',
+  [LogEvent.MASTERMIND_OFFLINE]: ([mastermind]) => `The Mastermind went offline. The new Mastermind is ${mastermind}.`,
+  [LogEvent.MISSION_SUCCEEDED]: ([mastermind], [mission, fails]) =>
+    `Mission ${mission} was a SUCCESS with ${fails} fail card(s). New mastermind is ${mastermind}.`,
+  [LogEvent.MISSION_FAILED]: ([mastermind], [mission, fails]) =>
+    `Mission ${mission} was a FAIL with ${fails} fail card(s). New mastermind is ${mastermind}.`,
+  [LogEvent.THIEVES_WIN]: () => 'Thieves have completed 3 missions successfully!',
+  [LogEvent.AGENTS_WIN]: () => 'Agents have sabotaged 3 missions!',
+  [LogEvent.GAME_RESET]: ([host]) => `Host ${host} has reset the game for a new round.`,
+};
+
+export const formatLogEntry = (entry, gameState) => {
+  const render = MESSAGES[entry.e];
+  if (!render) {
+    return `Unknown event ${entry.e}.`;
+  }
+  const names = (entry.p || []).map((seat) => playerName(entry, gameState, seat));
+  return render(names, entry.n || []);
+};
+
+export const logEntryTime = (entry, gameState) => new Date(gameState.createdAt).getTime() + entry.t;
@@ -1,35 +1,70 @@
+// Close code a sharded server uses to send the client to the node owning the game.
+const SHARD_REDIRECT_CODE = 4307;
+// Close code a restarting server uses after telling clients to reconnect.
+const SERVICE_RESTART_CODE = 1012;
+
 class SocketService {
   constructor() {
     this.socket = null;
+    this.eventSource = null;
   }
 
-  connect(gameId, playerId, onMessageCallback, onDisconnectCallback) {
+  connect(gameId, playerId, onMessageCallback, onDisconnectCallback, baseUrl = null) {
     // If a socket exists and is trying to connect or is open, do nothing.
     if (this.socket && (this.socket.readyState === 0 || this.socket.readyState === 1)) {
       console.log("WebSocket connection already exists or is connecting.");
       return;
     }
+    if (this.eventSource) {
+      console.log("Event stream already open.");
+      return;
+    }
 
     // Dynamically construct the WebSocket URL from the API base URL.
     // This replaces http/https with ws/wss.
-    const apiBaseUrl = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
+    // baseUrl is set when a sharded server points us at the node owning the game.
+    const apiBaseUrl = baseUrl || import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
     const wsProtocol = apiBaseUrl.startsWith('https') ? 'wss' : 'ws';
     const wsBaseUrl = apiBaseUrl.replace(/^https?:\/\//, '');
     const socketURL = `${wsProtocol}://${wsBaseUrl}/ws/${gameId}/${playerId}`;
     this.socket = new WebSocket(socketURL);
+    let opened = false;
 
     this.socket.onopen = () => {
+      opened = true;
       console.log("WebSocket connected");
     };
 
     this.socket.onmessage = (event) => {
       const message = JSON.parse(event.data);
+      if (message.type === 'reconnect') {
+        // The server is draining; the close that follows is handled below.
+        return;
+      }
       onMessageCallback(message);
     };
 
-    this.socket.onclose = () => {
+    this.socket.onclose = (event) => {
       console.log("WebSocket disconnected");
       this.socket = null; // Clear the socket instance on close
+      if (event.code === SHARD_REDIRECT_CODE && event.reason) {
+        // Another server node owns this game: reconnect there.
+        this.connect(gameId, playerId, onMessageCallback, onDisconnectCallback, event.reason);
+        return;
+      }
+      if (event.code === SERVICE_RESTART_CODE) {
+        // The server is restarting: reconnect after a jittered delay so clients
+        // don't all arrive at the remaining instances at once.
+        setTimeout(() => {
+          this.connect(gameId, playerId, onMessageCallback, onDisconnectCallback, baseUrl);
+        }, 500 + Math.random() * 1500);
+        return;
+      }
+      if (!opened) {
+        // The network never let the socket through: use Server-Sent Events instead.
+        this.connectEventStream(apiBaseUrl, gameId, playerId, onMessageCallback, onDisconnectCallback);
+        return;
+      }
       if (onDisconnectCallback) {
         onDisconnectCallback();
       }
@@ -41,10 +76,40 @@ class SocketService {
     };
   }
 
+  connectEventStream(apiBaseUrl, gameId, playerId, onMessageCallback, onDisconnectCallback) {
+    console.log("Falling back to Server-Sent Events");
+    // EventSource reconnects by itself and resumes with the Last-Event-ID header.
+    this.eventSource = new EventSource(`${apiBaseUrl}/sse/${gameId}/${playerId}`);
+
+    this.eventSource.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === 'reconnect') {
+        // The stream is about to end; EventSource reconnects by itself.
+        return;
+      }
+      onMessageCallback(message);
+    };
+
+    this.eventSource.onerror = () => {
+      // Only a closed stream is final; otherwise the browser is already retrying.
+      if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+        console.log("Event stream closed");
+        this.eventSource = null;
+        if (onDisconnectCallback) {
+          onDisconnectCallback();
+        }
+      }
+    };
+  }
+
   disconnect() {
     if (this.socket) {
       this.socket.close();
     }
+    if (this.eventSource) {
+      this.eventSource.close();
+      this.eventSource = null;
+    }
   }
 }
 
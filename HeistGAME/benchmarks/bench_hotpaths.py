@@ -0,0 +1,186 @@
+"""
+Microbenchmarks for the game server's hot paths.
+
+Run from the HeistGAME directory:
+
+    python -m benchmarks.bench_hotpaths                  # compare against the stored baseline
+    python -m benchmarks.bench_hotpaths --save-baseline  # record a new baseline
+    python -m benchmarks.bench_hotpaths -k broadcast     # only benchmarks whose name matches
+
+Each benchmark reports the best per-call time over several repeats. Against a
+baseline, any benchmark slower by more than --threshold is flagged and the
+script exits non-zero, so it can gate CI. Baselines are machine specific:
+record them on the machine you compare on.
+"""
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+import timeit
+from datetime import datetime
+
+from modules.game import ConnectionManager, GAME_BALANCING_MATRIX, _get_next_mastermind, _tally_votes, _tally_mission
+from modules.game_models import (
+    GameState, Player, GameStatus, Phase, Role, VoteChoice, MissionChoice, Mission, LogEntry, LogEvent, ChatMessage,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+PLAYER_COUNTS = (5, 8)
+HISTORY_SIZES = (0, 500, 5000)
+
+
+class FakeWebSocket:
+    """
+    Stands in for a connected client: accepts every frame and counts the bytes.
+    """
+    def __init__(self):
+        self.bytes_sent = 0
+
+    async def send_text(self, data: str):
+        self.bytes_sent += len(data)
+
+    async def send_json(self, data):
+        self.bytes_sent += len(json.dumps(data))
+
+
+def build_game(player_count: int, history_size: int) -> GameState:
+    """
+    Builds a mid-game state: roles dealt, two missions played, a team on the vote,
+    and `history_size` chat messages and log entries each.
+    """
+    rng = random.Random(player_count * 10007 + history_size)
+    players = {}
+    for i in range(player_count):
+        uid = f"player-{i:02d}-{rng.getrandbits(64):016x}"
+        players[uid] = Player(uid=uid, displayName=f"Player {i}", character=f"char{i + 1}",
+                              chatColor="#82c9ff", isReady=True)
+    order = list(players)
+    agents = GAME_BALANCING_MATRIX[player_count]["agents"]
+    for i, uid in enumerate(order):
+        players[uid].role = Role.AGENT if i < agents else Role.THIEF
+
+    game = GameState(
+        gameId=f"bench{player_count}{history_size}",
+        hostId=order[0],
+        players=players,
+        playerOrder=order,
+        status=GameStatus.IN_PROGRESS,
+        phase=Phase.TEAM_VOTE,
+        missionNumber=3,
+        roundNumber=2,
+        mastermindId=order[1],
+        proposedTeam=order[:3],
+    )
+    game.missionHistory = [
+        Mission(missionNumber=1, team=order[:2], result=MissionChoice.SUCCESS, failVotes=0),
+        Mission(missionNumber=2, team=order[1:4], result=MissionChoice.FAIL, failVotes=1),
+    ]
+    now = datetime.utcnow()
+    for i in range(history_size):
+        sender = players[order[i % player_count]]
+        game.chatHistory.append(ChatMessage(timestamp=now, senderId=sender.uid, senderName=sender.displayName,
+                                            message=f"message number {i} from {sender.displayName}",
+                                            senderColor=sender.chatColor))
+        game.gameLog.append(LogEntry(offsetMs=i * 1000, event=LogEvent.TEAM_PROPOSED, seats=[i % player_count, 0, 1]))
+    for uid in order:
+        game.votes[uid] = VoteChoice.APPROVE if rng.random() < 0.6 else VoteChoice.REJECT
+    return game
+
+
+def _benchmarks():
+    """
+    Yields (name, zero-argument callable) pairs.
+    """
+    loop = asyncio.new_event_loop()
+
+    for player_count in PLAYER_COUNTS:
+        for history_size in HISTORY_SIZES:
+            game = build_game(player_count, history_size)
+            game_json = game.model_dump_json()
+            suffix = f"{player_count}p_{history_size}h"
+            yield f"model_validate_json[{suffix}]", lambda j=game_json: GameState.model_validate_json(j)
+            yield f"model_dump_json[{suffix}]", game.model_dump_json
+
+            # No coalescing window: measure the encode-and-send itself.
+            manager = ConnectionManager(coalesce_ms=0)
+            manager.active_connections[game.gameId] = {uid: FakeWebSocket() for uid in game.players}
+            yield f"broadcast[{suffix}]", \
+                lambda m=manager, g=game: loop.run_until_complete(m.broadcast(g.gameId, g))
+
+    for player_count in PLAYER_COUNTS:
+        game = build_game(player_count, 0)
+        yield f"get_next_mastermind[{player_count}p]", lambda g=game: _get_next_mastermind(g)
+        yield f"tally_votes[{player_count}p]", lambda g=game: _tally_votes(g)
+
+        mission_game = build_game(player_count, 0)
+        mission_game.phase = Phase.MISSION
+        for uid in mission_game.proposedTeam:
+            player = mission_game.players[uid]
+            player.missionChoice = MissionChoice.FAIL if player.role == Role.AGENT else MissionChoice.SUCCESS
+        yield f"tally_mission[{player_count}p]", lambda g=mission_game: _tally_mission(g)
+
+
+def measure(func, repeat: int) -> float:
+    """
+    Returns the best observed time per call, in microseconds.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Path of the baseline file.")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Relative slowdown that counts as a regression (default: 0.15 = 15%%).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats per benchmark (best is kept).")
+    parser.add_argument("-k", dest="filter", default="", help="Only run benchmarks whose name contains this.")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<40} {'us/call':>12} {'baseline':>12} {'change':>9}")
+    for name, func in _benchmarks():
+        if args.filter not in name:
+            continue
+        results[name] = us = measure(func, args.repeat)
+        line = f"{name:<40} {us:>12.2f}"
+        if name in baseline:
+            change = us / baseline[name] - 1
+            flag = "  REGRESSION" if change > args.threshold else ""
+            line += f" {baseline[name]:>12.2f} {change:>+8.1%}{flag}"
+            if flag:
+                regressions.append(name)
+        print(line)
+
+    if args.save_baseline:
+        # Merge, so saving a filtered run (-k) keeps the other benchmarks' baselines.
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                stored = json.load(f)["results"]
+        stored.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": stored}, f, indent=2, sort_keys=True)
+        print(f"\nSaved baseline to {args.baseline}")
+    elif not baseline:
+        print("\nNo baseline found; run with --save-baseline to record one.")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
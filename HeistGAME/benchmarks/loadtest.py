@@ -0,0 +1,322 @@
+"""
+End-to-end load generator for the game server.
+
+Drives the real HTTP API and WebSockets the way browsers do: hosts create games,
+players join and ready up, every player holds a socket, and simple client-side
+bot logic plays each game to the end.
+
+Against a server that is already running:
+
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --games 200 --concurrency 50
+
+Or let the script start a local uvicorn worker with the in-memory Valkey stand-in
+and shortened reveal phases:
+
+    python -m benchmarks.loadtest --spawn-server --games 1000 --concurrency 250
+
+Reported: action-to-broadcast latency percentiles (from sending an action to the
+acting player's socket showing its effect), HTTP latency, throughput, stored state
+size per game and, with --spawn-server, server RSS per concurrent game.
+
+Extra dependencies: see benchmarks/requirements.txt.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+from modules.game import MISSION_TEAM_SIZES
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Stats:
+    def __init__(self):
+        self.action_latency: List[float] = []  # seconds, action sent -> effect seen on own socket
+        self.http_latency: List[float] = []
+        self.actions = 0
+        self.errors = 0
+        self.error_statuses: Dict[str, int] = {}
+        self.games_finished = 0
+        self.games_failed = 0
+        self.state_bytes: List[int] = []
+        self.ws_messages = 0
+
+
+class SimulatedPlayer:
+    """
+    One client: a socket that reacts to each state update with the move a
+    player in that seat would make.
+    """
+    def __init__(self, run: "LoadRun", game_id: str, player_id: str):
+        self.run = run
+        self.game_id = game_id
+        self.player_id = player_id
+        self.finished = asyncio.Event()
+        self.last_state: Optional[dict] = None
+        self._done_moves = set()
+        # (predicate on state, time the action was sent) for actions waiting to show up
+        self._pending: List[tuple] = []
+
+    async def listen(self, ws_url: str, connected: asyncio.Event):
+        async with websockets.connect(f"{ws_url}/ws/{self.game_id}/{self.player_id}", max_size=None) as ws:
+            connected.set()
+            async for raw in ws:
+                self.run.stats.ws_messages += 1
+                state = json.loads(raw)
+                self._resolve_pending(state)
+                self.last_state = state
+                if state.get("status") == "FINISHED":
+                    self.finished.set()
+                    return
+                self._react(state)
+
+    def _resolve_pending(self, state: dict):
+        now = time.perf_counter()
+        still_pending = []
+        for predicate, sent_at in self._pending:
+            if predicate(state):
+                self.run.stats.action_latency.append(now - sent_at)
+            else:
+                still_pending.append((predicate, sent_at))
+        self._pending = still_pending
+
+    def _react(self, state: dict):
+        if state.get("status") != "IN_PROGRESS":
+            return
+        me = state["players"].get(self.player_id)
+        if me is None:
+            return
+        phase = state["phase"]
+        key = (phase, state["missionNumber"], state["roundNumber"])
+        if key in self._done_moves:
+            return
+
+        if phase == "TEAM_SELECTION" and state.get("mastermindId") == self.player_id:
+            team_size = MISSION_TEAM_SIZES[len(state["players"])][state["missionNumber"] - 1]
+            others = [pid for pid in state["playerOrder"] if pid != self.player_id]
+            random.shuffle(others)
+            team = [self.player_id] + others[:team_size - 1]
+            self._act(key, "propose-team", {"player_id": self.player_id, "team": team},
+                      lambda s: s["phase"] != "TEAM_SELECTION" or s.get("proposedTeam") == team)
+        elif phase == "TEAM_VOTE" and self.player_id not in (state.get("votes") or {}):
+            vote = "APPROVE" if state["roundNumber"] >= 4 or random.random() < 0.7 else "REJECT"
+            self._act(key, "submit-vote", {"player_id": self.player_id, "vote": vote},
+                      lambda s: self.player_id in (s.get("votes") or {}) or s["phase"] != "TEAM_VOTE")
+        elif phase == "MISSION" and self.player_id in (state.get("proposedTeam") or []) \
+                and me.get("missionChoice") is None:
+            choice = "FAIL" if me.get("role") == "AGENT" else "SUCCESS"
+            self._act(key, "play-mission-card", {"player_id": self.player_id, "choice": choice},
+                      lambda s: s["players"][self.player_id].get("missionChoice") is not None or s["phase"] != "MISSION")
+
+    def _act(self, key, action: str, body: dict, predicate):
+        self._done_moves.add(key)
+        self._pending.append((predicate, time.perf_counter()))
+        asyncio.create_task(self.run.post(f"/games/{self.game_id}/{action}", json=body))
+
+
+class LoadRun:
+    def __init__(self, args):
+        self.args = args
+        self.stats = Stats()
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def post(self, path: str, **kwargs) -> Optional[dict]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(f"/api/v1{path}", **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.errors += 1
+            self.stats.error_statuses[type(e).__name__] = self.stats.error_statuses.get(type(e).__name__, 0) + 1
+            return None
+        self.stats.http_latency.append(time.perf_counter() - start)
+        self.stats.actions += 1
+        if response.status_code >= 400:
+            self.stats.errors += 1
+            key = f"{response.status_code} {path.rsplit('/', 1)[-1]}"
+            self.stats.error_statuses[key] = self.stats.error_statuses.get(key, 0) + 1
+            return None
+        return response.json() if response.content else {}
+
+    async def play_game(self, index: int):
+        args = self.args
+        players: Dict[str, SimulatedPlayer] = {}
+        listeners = []
+        try:
+            game = await self.post("/games/", params={"host_display_name": f"Host {index}"})
+            if not game:
+                raise RuntimeError("create failed")
+            game_id, host_id = game["gameId"], game["hostId"]
+            player_ids = [host_id]
+            for seat in range(1, args.players):
+                joined = await self.post(f"/games/{game_id}/join", params={"display_name": f"P{index}-{seat}"})
+                if not joined:
+                    raise RuntimeError("join failed")
+                player_ids.append(joined["new_player_id"])
+
+            for player_id in player_ids:
+                player = players[player_id] = SimulatedPlayer(self, game_id, player_id)
+                connected = asyncio.Event()
+                listeners.append(asyncio.create_task(player.listen(args.ws_url, connected)))
+                await connected.wait()
+
+            for player_id in player_ids[1:]:
+                await self.post(f"/games/{game_id}/ready", json={"player_id": player_id})
+            if not await self.post(f"/games/{game_id}/start", json={"player_id": host_id}):
+                raise RuntimeError("start failed")
+
+            await asyncio.wait_for(
+                asyncio.gather(*(p.finished.wait() for p in players.values())), timeout=args.game_timeout)
+            final = players[host_id].last_state
+            self.stats.state_bytes.append(len(json.dumps(final, separators=(",", ":"))))
+            self.stats.games_finished += 1
+        except (RuntimeError, asyncio.TimeoutError, OSError, websockets.WebSocketException) as e:
+            self.stats.games_failed += 1
+            if args.verbose:
+                print(f"game {index} failed: {e!r}", file=sys.stderr)
+        finally:
+            for task in listeners:
+                task.cancel()
+
+    async def main(self) -> Stats:
+        args = self.args
+        limits = httpx.Limits(max_connections=args.concurrency * args.players, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+            self.client = client
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def bounded(index: int):
+                async with semaphore:
+                    await self.play_game(index)
+
+            await asyncio.gather(*(bounded(i) for i in range(args.games)))
+        return self.stats
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.setdefault("VALKEY_BACKEND", "memory")
+    env.setdefault("AGENT_REVEAL_SECONDS", "0.2")
+    env.setdefault("VOTE_REVEAL_SECONDS", "0.2")
+    env.setdefault("MISSION_REVEAL_SECONDS", "0.2")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env.setdefault("ARCHIVE_DB_PATH", os.path.join("benchmarks", "loadtest_archive.sqlite3"))
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--ws-max-size", str(64 * 1024 * 1024)],
+        cwd=server_dir, env=env,
+    )
+
+
+async def wait_for_server(base_url: str, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/api/v1/games")
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not come up within {timeout}s.")
+
+
+def report(stats: Stats, elapsed: float, args, rss_before: Optional[int], rss_peak: Optional[int]):
+    ms = lambda seconds: f"{seconds * 1000:8.1f} ms"
+    print(f"\n=== Load test: {args.games} games x {args.players} players, concurrency {args.concurrency} ===")
+    print(f"games finished     {stats.games_finished}  (failed: {stats.games_failed})")
+    print(f"elapsed            {elapsed:.1f} s")
+    print(f"throughput         {stats.actions / elapsed:.1f} HTTP actions/s, "
+          f"{stats.ws_messages / elapsed:.1f} socket messages/s, {stats.games_finished / elapsed * 60:.1f} games/min")
+    breakdown = ", ".join(f"{key}: {count}" for key, count in sorted(stats.error_statuses.items()))
+    print(f"errors             {stats.errors}" + (f"  ({breakdown})" if breakdown else ""))
+    for label, samples in (("action->broadcast", stats.action_latency), ("http request", stats.http_latency)):
+        print(f"{label:<18} p50 {ms(percentile(samples, 50))}  p95 {ms(percentile(samples, 95))}  "
+              f"p99 {ms(percentile(samples, 99))}  (n={len(samples)})")
+    if stats.state_bytes:
+        print(f"final state size   {sum(stats.state_bytes) / len(stats.state_bytes) / 1024:.1f} KiB per game (avg)")
+    if rss_before is not None and rss_peak is not None:
+        per_game = (rss_peak - rss_before) / max(1, min(args.concurrency, args.games))
+        print(f"server RSS         {rss_before / 1024:.1f} MiB idle, {rss_peak / 1024:.1f} MiB peak, "
+              f"~{per_game:.0f} KiB per concurrent game")
+
+
+async def run(args) -> int:
+    server = None
+    if args.spawn_server:
+        server = spawn_server(args.port)
+        args.base_url = f"http://127.0.0.1:{args.port}"
+    args.ws_url = args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+
+    try:
+        await wait_for_server(args.base_url)
+        rss_before = read_rss_kb(server.pid) if server else None
+        rss_peak = rss_before
+
+        async def sample_rss():
+            nonlocal rss_peak
+            while True:
+                await asyncio.sleep(0.5)
+                rss = read_rss_kb(server.pid)
+                if rss is not None:
+                    rss_peak = max(rss_peak or 0, rss)
+
+        sampler = asyncio.create_task(sample_rss()) if server else None
+        start = time.perf_counter()
+        stats = await LoadRun(args).main()
+        elapsed = time.perf_counter() - start
+        if sampler:
+            sampler.cancel()
+        report(stats, elapsed, args, rss_before, rss_peak)
+        return 0 if stats.games_failed == 0 else 1
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Server to test (ignored with --spawn-server).")
+    parser.add_argument("--spawn-server", action="store_true",
+                        help="Start a local uvicorn worker with the in-memory Valkey stand-in.")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --spawn-server.")
+    parser.add_argument("--games", type=int, default=100, help="Total number of games to play.")
+    parser.add_argument("--players", type=int, default=5, choices=range(5, 9), help="Players per game.")
+    parser.add_argument("--concurrency", type=int, default=25, help="Games in flight at once.")
+    parser.add_argument("--game-timeout", type=float, default=300, help="Seconds before a game counts as failed.")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for client decisions.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print why individual games failed.")
+    args = parser.parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,45 @@
 import os
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
+import logging
+from contextlib import asynccontextmanager
+import asyncio
+from typing import Optional
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from modules.logging_config import setup_logging, stop_logging
 from modules.database import get_valkey_client
-from modules.game import router as game_router, connection_manager, GameState,handle_player_exit
+from modules import keys
+from modules.game import router as game_router, connection_manager, GameState,handle_player_exit, get_game_state_from_db, SSEConnection
+from modules.archive import game_archiver
+from modules.stats import router as stats_router
+from modules.matchmaking import router as matchmaking_router
+from modules.bots import router as bots_router, reclaim_seat, bot_controller
+from modules.tournaments import router as tournaments_router
+from modules.metrics import MetricsMiddleware, render_metrics
+from modules.profiling import ProfilingMiddleware, profiler
+from modules.idempotency import IdempotencyMiddleware
+from modules.sharding import ShardRoutingMiddleware, shard_coordinator
+from modules.lifecycle import lifecycle
+from modules.admin import router as admin_router
 
-app = FastAPI()
+setup_logging()
+logger = logging.getLogger("main")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start background workers on startup and flush them on shutdown.
+    setup_logging()
+    await game_archiver.start()
+    await shard_coordinator.start()
+    await lifecycle.start()
+    yield
+    await lifecycle.stop()
+    await shard_coordinator.stop()
+    await game_archiver.stop()
+    profiler.dump_all()
+    stop_logging()
+
+app = FastAPI(lifespan=lifespan)
 
 # --- CORS Middleware (for development) ---
 # This allows the frontend development server (e.g., http://localhost:5173)
@@ -22,9 +57,14 @@ origins = [
 # For production, get the frontend URL from an environment variable
 frontend_url = os.environ.get("FRONTEND_URL")
 if frontend_url:
-    print(f"--- Adding {frontend_url} to CORS origins ---")
+    logger.info(f"Adding {frontend_url} to CORS origins")
     origins.append(frontend_url)
 
+# Inside CORS, so that CORS headers are also added to replayed and redirected responses.
+app.add_middleware(IdempotencyMiddleware)
+# Sharded deployments: send requests for other nodes' games to their owner.
+app.add_middleware(ShardRoutingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -33,37 +73,142 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # --- API Routes ---
 # Include all the game logic routes from our module
 app.include_router(game_router, prefix="/api/v1")
+app.include_router(stats_router, prefix="/api/v1")
+app.include_router(matchmaking_router, prefix="/api/v1")
+app.include_router(bots_router, prefix="/api/v1")
+app.include_router(tournaments_router, prefix="/api/v1")
+app.include_router(admin_router)
 
 # --- WebSocket Connection ---
 # This is the endpoint the frontend will connect to for real-time updates.
+# Registered before the player route so "spectate" is never taken for a player_id.
+@app.websocket("/ws/{game_id}/spectate")
+async def spectator_endpoint(websocket: WebSocket, game_id: str):
+    if connection_manager.draining:
+        # Shutting down: "service restart", so the client reconnects elsewhere.
+        await websocket.close(code=1012)
+        return
+    db_client = get_valkey_client()
+    game_json = db_client.get(keys.game_state(game_id))
+    if not game_json:
+        await websocket.close(code=1008)
+        return
+
+    game = GameState.model_validate_json(game_json)
+    await connection_manager.connect_spectator(game_id, websocket)
+    bot_controller.on_state_change(game_id, game)
+    try:
+        # Spectators get the current public view straight away, then every update.
+        await websocket.send_text(connection_manager.public_view(game))
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        connection_manager.disconnect_spectator(game_id, websocket)
+
 @app.websocket("/ws/{game_id}/{player_id}")
 async def websocket_endpoint(websocket: WebSocket, game_id: str, player_id: str):
-    
+    if connection_manager.draining:
+        await websocket.close(code=1012)
+        return
+
     db_client = get_valkey_client()
-    game_json = db_client.get(game_id)
+    game_json = db_client.get(keys.game_state(game_id))
     if not game_json:
         await websocket.close(code=1008)
         return
     
     game = GameState.model_validate_json(game_json)
-    if player_id not in game.players:
+    # Host-added bots have no human to connect as them.
+    if player_id not in game.players or game.players[player_id].addedAsBot:
         await websocket.close(code=1008)
         return
 
     await connection_manager.connect(game_id, player_id, websocket)
+    if game.players[player_id].isBot:
+        # The player is back: take their seat over from the bot.
+        await reclaim_seat(game_id, player_id, db_client)
+    else:
+        # Bots only act on local broadcasts. After a redeploy this instance has not
+        # seen one for the game yet, so pick up any bot moves still pending.
+        bot_controller.on_state_change(game_id, game)
     try:
         while True:
             # Keep the connection alive, listening for disconnect
             await websocket.receive_text()
     except WebSocketDisconnect:
+        # Only treat this as an exit if the socket is still the player's connection:
+        # sockets sent to another node after a ring change are unregistered first.
+        if connection_manager.active_connections.get(game_id, {}).get(player_id) is not websocket:
+            return
         connection_manager.disconnect(game_id, player_id)
-        # Use the new shared handler for both clean exits and disconnects
-        await handle_player_exit(game_id, player_id, db_client)
+        # Sockets closed by a drain are coming back, not leaving.
+        if not connection_manager.draining:
+            # Use the new shared handler for both clean exits and disconnects
+            await handle_player_exit(game_id, player_id, db_client)
         
+# --- Server-Sent Events Fallback ---
+# For clients whose network drops WebSockets: the same per-player updates as
+# /ws/{game_id}/{player_id}, as one long-lived HTTP response. Each event's id
+# identifies its snapshot, so a client resuming with Last-Event-ID only gets the
+# current state again if it has changed in the meantime.
+
+SSE_KEEPALIVE_SECONDS = float(os.environ.get("SSE_KEEPALIVE_SECONDS", 15))
+
+@app.get("/sse/{game_id}/{player_id}")
+async def sse_endpoint(game_id: str, player_id: str, last_event_id: Optional[str] = Header(None)):
+    if connection_manager.draining:
+        raise HTTPException(status_code=503, detail="Server is restarting.", headers={"Retry-After": "1"})
+    db_client = get_valkey_client()
+    game = await get_game_state_from_db(game_id)
+    if player_id not in game.players or game.players[player_id].addedAsBot:
+        raise HTTPException(status_code=403, detail="Player not in this game.")
+
+    connection = SSEConnection()
+    connection_manager.attach(game_id, player_id, connection)
+    if game.players[player_id].isBot:
+        # The player is back: take their seat over from the bot.
+        await reclaim_seat(game_id, player_id, db_client)
+    else:
+        bot_controller.on_state_change(game_id, game)
+
+    snapshot = connection_manager.player_view(game, player_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id != SSEConnection.event_id(snapshot):
+                yield SSEConnection.format_event(snapshot)
+            while True:
+                try:
+                    text = await asyncio.wait_for(connection.queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from timing out an idle stream.
+                    yield ": keepalive\n\n"
+                    continue
+                if text is None:
+                    break
+                yield SSEConnection.format_event(text)
+        finally:
+            # Only treat this as an exit if the player has not reconnected since.
+            if connection_manager.active_connections.get(game_id, {}).get(player_id) is connection:
+                connection_manager.disconnect(game_id, player_id)
+                if not connection_manager.draining:
+                    await asyncio.shield(handle_player_exit(game_id, player_id, db_client))
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return render_metrics()
+
 @app.get("/test-cors")
 async def test_cors_endpoint():
-    print("--- /test-cors endpoint was hit successfully! ---")
+    logger.info("/test-cors endpoint was hit successfully")
     return {"message": "CORS is working!"}
\ No newline at end of file
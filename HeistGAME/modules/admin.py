@@ -0,0 +1,63 @@
+import os
+from fastapi import APIRouter, HTTPException, Header, Depends, Query
+from typing import List, Literal, Optional
+
+from .profiling import profiler
+from .game import live_games
+from .game_models import ProfilingSettings, LiveGameSummary
+
+# --- Operator Endpoints ---
+# Admin routes are only enabled when ADMIN_TOKEN is set, and every request must
+# present it in the X-Admin-Token header.
+
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    FastAPI dependency guarding the admin routes.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@router.get("/games", response_model=List[LiveGameSummary])
+async def list_live_games(
+    sort: Literal["size", "stale"] = Query("stale", description="size: largest state first; stale: longest idle first."),
+    limit: int = Query(100, ge=1, le=10000),
+):
+    """
+    Lists the unfinished games this process is serving, from the live game index.
+    """
+    games = live_games.snapshot()
+    if sort == "size":
+        games.sort(key=lambda g: g.sizeBytes, reverse=True)
+    else:
+        games.sort(key=lambda g: g.lastActivity)
+    return games[:limit]
+
+@router.get("/profiling", response_model=ProfilingSettings)
+async def get_profiling():
+    """
+    Returns the current profiler settings.
+    """
+    return ProfilingSettings(sample_rate=profiler.sample_rate, dump_every=profiler.dump_every)
+
+@router.put("/profiling", response_model=ProfilingSettings)
+async def set_profiling(settings: ProfilingSettings):
+    """
+    Turns sampling on or off at runtime. A sample rate of 0 disables profiling.
+    The output directory is only set through PROFILE_DIR.
+    """
+    profiler.sample_rate = settings.sample_rate
+    profiler.dump_every = settings.dump_every
+    return ProfilingSettings(sample_rate=profiler.sample_rate, dump_every=profiler.dump_every)
+
+@router.post("/profiling/dump")
+async def dump_profiles():
+    """
+    Writes out the samples collected so far without waiting for a full batch.
+    """
+    return {"files": profiler.dump_all()}
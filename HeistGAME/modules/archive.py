@@ -0,0 +1,141 @@
+import os
+import json
+import sqlite3
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from .game_models import GameState
+
+logger = logging.getLogger(__name__)
+
+# --- Finished-Game Archive ---
+# Finished games are handed to the archiver through an in-memory queue and written
+# to a local SQLite file by a single background worker, so the request/broadcast
+# path never waits on disk I/O. Writes are grouped into one transaction per batch.
+
+ARCHIVE_DB_PATH = os.environ.get("ARCHIVE_DB_PATH", "heist_archive.sqlite3")
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 50))
+ARCHIVE_FLUSH_INTERVAL = float(os.environ.get("ARCHIVE_FLUSH_INTERVAL", 2.0))
+ARCHIVE_QUEUE_SIZE = int(os.environ.get("ARCHIVE_QUEUE_SIZE", 10000))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    winner TEXT,
+    player_count INTEGER NOT NULL,
+    mission_history TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_players (
+    archive_id INTEGER NOT NULL REFERENCES games(id),
+    player_id TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    role TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_games_finished_at ON games(finished_at);
+CREATE INDEX IF NOT EXISTS idx_games_winner ON games(winner);
+CREATE INDEX IF NOT EXISTS idx_game_players_player ON game_players(player_id);
+CREATE INDEX IF NOT EXISTS idx_game_players_archive ON game_players(archive_id);
+"""
+
+
+class GameArchiver:
+    def __init__(self, db_path: str = ARCHIVE_DB_PATH):
+        self.db_path = db_path
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _open(self) -> sqlite3.Connection:
+        # The connection is only ever used by one batch at a time, from worker threads.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    async def start(self):
+        """
+        Opens the archive database and starts the background writer.
+        """
+        if self._worker is not None:
+            return
+        self._conn = await asyncio.to_thread(self._open)
+        self._queue = asyncio.Queue(maxsize=ARCHIVE_QUEUE_SIZE)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Flushes any queued games and closes the archive database.
+        """
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        await asyncio.to_thread(self._conn.close)
+        self._conn = None
+
+    def submit(self, game: GameState):
+        """
+        Queues a finished game for archiving. Never blocks the caller.
+        """
+        if self._queue is None:
+            return
+        record = (
+            game.gameId,
+            game.createdAt.isoformat(),
+            datetime.utcnow().isoformat(),
+            game.winner.value if game.winner else None,
+            json.dumps([m.model_dump(mode="json") for m in game.missionHistory]),
+            [(p.uid, p.displayName, p.role.value if p.role else None) for p in game.players.values()],
+        )
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            logger.warning("Archive queue full, dropping game", extra={"game_id": game.gameId})
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Give the batch a short window to fill up before writing.
+            deadline = asyncio.get_running_loop().time() + ARCHIVE_FLUSH_INTERVAL
+            while len(batch) < ARCHIVE_BATCH_SIZE:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception:
+                logger.exception(f"Failed to write archive batch of {len(batch)} games")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[tuple]):
+        with self._conn:
+            for game_id, created_at, finished_at, winner, mission_history, players in batch:
+                cursor = self._conn.execute(
+                    "INSERT INTO games (game_id, created_at, finished_at, winner, player_count, mission_history) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (game_id, created_at, finished_at, winner, len(players), mission_history),
+                )
+                self._conn.executemany(
+                    "INSERT INTO game_players (archive_id, player_id, display_name, role) VALUES (?, ?, ?, ?)",
+                    [(cursor.lastrowid, *player) for player in players],
+                )
+
+
+game_archiver = GameArchiver()
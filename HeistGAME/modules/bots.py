@@ -0,0 +1,180 @@
+import os
+import random
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Dict, Optional
+from redis import Redis as Valkey
+
+from .database import get_valkey_client
+from .game import (
+    connection_manager, get_game_state_from_db, _add_player, _save_game, _load_game, _log_event,
+    propose_team, submit_vote, play_mission_card, toggle_ready_status, MISSION_TEAM_SIZES,
+)
+from .game_models import (
+    GameState, GameStatus, Phase, Role, VoteChoice, MissionChoice, ProposeTeamRequest, SubmitVoteRequest,
+    PlayMissionCardRequest, AddBotRequest, JoinGameResponse, LogEvent,
+)
+
+# --- Server-Side Bot Players ---
+# Bots have no task of their own. The controller listens to every broadcast and,
+# when a bot seat has something to do in the new state, schedules a single short
+# task for that game which plays all pending bot moves through the normal
+# endpoint handlers, so bots follow exactly the same rules as humans.
+
+# How long a bot "thinks" before acting. Set to 0 for load tests.
+BOT_THINK_DELAY = float(os.environ.get("BOT_THINK_DELAY", 1.5))
+
+BOT_NAMES = ["Ace", "Cipher", "Dash", "Echo", "Ghost", "Jinx", "Nova", "Rook"]
+
+
+def _bot_has_move(game: GameState) -> bool:
+    """
+    Cheap check run on every broadcast: does any bot seat need to act?
+    """
+    if game.status == GameStatus.LOBBY:
+        return any(p.isBot and not p.isReady for p in game.players.values())
+    if game.status != GameStatus.IN_PROGRESS:
+        return False
+    if game.phase == Phase.TEAM_SELECTION:
+        mastermind = game.players.get(game.mastermindId)
+        return bool(mastermind and mastermind.isBot)
+    if game.phase == Phase.TEAM_VOTE:
+        return any(p.isBot and pid not in game.votes for pid, p in game.players.items())
+    if game.phase == Phase.MISSION and game.proposedTeam:
+        return any(
+            game.players[pid].isBot and game.players[pid].missionChoice is None
+            for pid in game.proposedTeam if pid in game.players
+        )
+    return False
+
+def _choose_team(game: GameState, bot_id: str) -> list:
+    team_size = MISSION_TEAM_SIZES[len(game.players)][game.missionNumber - 1]
+    bot = game.players[bot_id]
+    others = [pid for pid in game.players if pid != bot_id]
+    if bot.role == Role.THIEF:
+        # Thieves steer clear of anyone who was on a failed mission.
+        suspects = {pid for m in game.missionHistory if m.result == MissionChoice.FAIL for pid in m.team}
+        random.shuffle(others)
+        others.sort(key=lambda pid: pid in suspects)
+    else:
+        random.shuffle(others)
+    return [bot_id] + others[:team_size - 1]
+
+def _choose_vote(game: GameState, bot_id: str) -> VoteChoice:
+    bot = game.players[bot_id]
+    team = game.proposedTeam or []
+    if bot.role == Role.AGENT:
+        has_agent = any(game.players[pid].role == Role.AGENT for pid in team if pid in game.players)
+        return VoteChoice.APPROVE if has_agent else VoteChoice.REJECT
+    # A fifth rejection hands the win to the Agents, so Thieves never cast it.
+    if game.roundNumber >= 5:
+        return VoteChoice.APPROVE
+    suspects = {pid for m in game.missionHistory if m.result == MissionChoice.FAIL for pid in m.team}
+    if any(pid in suspects for pid in team if pid != bot_id):
+        return VoteChoice.REJECT
+    return VoteChoice.APPROVE if bot_id in team or random.random() < 0.7 else VoteChoice.REJECT
+
+def _choose_card(game: GameState, bot_id: str) -> MissionChoice:
+    # Thieves may only play SUCCESS; Agents always sabotage.
+    return MissionChoice.FAIL if game.players[bot_id].role == Role.AGENT else MissionChoice.SUCCESS
+
+
+class BotController:
+    def __init__(self):
+        # {game_id: Task} for games with bot moves scheduled
+        self._scheduled: Dict[str, asyncio.Task] = {}
+
+    def on_state_change(self, game_id: str, game: GameState):
+        if game_id in self._scheduled or not _bot_has_move(game):
+            return
+        self._scheduled[game_id] = asyncio.create_task(self._play(game_id))
+
+    async def _play(self, game_id: str):
+        try:
+            await asyncio.sleep(BOT_THINK_DELAY)
+        finally:
+            # Moves made below broadcast again and may schedule the next turn.
+            self._scheduled.pop(game_id, None)
+
+        game = await self._load(game_id)
+        if not game or not _bot_has_move(game):
+            return
+
+        bot_ids = [pid for pid, p in game.players.items() if p.isBot]
+        for bot_id in bot_ids:
+            # Re-read before every move so a human action in between is never overwritten.
+            game = await self._load(game_id)
+            if not game:
+                return
+            try:
+                await self._move(game, bot_id)
+            except HTTPException:
+                # The move was no longer legal (e.g. the phase moved on); skip it.
+                continue
+
+    async def _load(self, game_id: str) -> Optional[GameState]:
+        try:
+            return await get_game_state_from_db(game_id)
+        except HTTPException:
+            return None
+
+    async def _move(self, game: GameState, bot_id: str):
+        bot = game.players[bot_id]
+        if game.status == GameStatus.LOBBY:
+            if not bot.isReady:
+                await toggle_ready_status(player_id=bot_id, game=game)
+        elif game.phase == Phase.TEAM_SELECTION and game.mastermindId == bot_id:
+            request = ProposeTeamRequest(player_id=bot_id, team=_choose_team(game, bot_id))
+            await propose_team(request, game=game)
+        elif game.phase == Phase.TEAM_VOTE and bot_id not in game.votes:
+            request = SubmitVoteRequest(player_id=bot_id, vote=_choose_vote(game, bot_id))
+            await submit_vote(request, game=game)
+        elif game.phase == Phase.MISSION and game.proposedTeam and bot_id in game.proposedTeam \
+                and bot.missionChoice is None:
+            request = PlayMissionCardRequest(player_id=bot_id, choice=_choose_card(game, bot_id))
+            await play_mission_card(request, game=game)
+
+bot_controller = BotController()
+connection_manager.add_listener(bot_controller.on_state_change)
+
+
+async def reclaim_seat(game_id: str, player_id: str, db_client: Valkey):
+    """
+    Hands a seat that a bot took over back to the player when they reconnect.
+    """
+    game = _load_game(db_client, game_id)
+    if not game:
+        return
+    player = game.players.get(player_id)
+    if not player or not player.isBot or player.addedAsBot:
+        return
+    player.isBot = False
+    _log_event(game, LogEvent.SEAT_RECLAIMED, [player_id])
+    _save_game(db_client, game)
+    await connection_manager.broadcast(game_id, game)
+
+
+router = APIRouter()
+
+@router.post("/games/{game_id}/bots", response_model=JoinGameResponse)
+async def add_bot(request: AddBotRequest, game: GameState = Depends(get_game_state_from_db)):
+    """
+    Allows the host to fill an empty lobby seat with a bot.
+    """
+    db_client = get_valkey_client()
+
+    if game.hostId != request.host_id:
+        raise HTTPException(status_code=403, detail="Only the host can add bots.")
+
+    used_names = {p.displayName for p in game.players.values()}
+    name = next((f"{n} (Bot)" for n in BOT_NAMES if f"{n} (Bot)" not in used_names), "Bot")
+
+    bot_id = _add_player(game, name)
+    game.players[bot_id].isBot = True
+    game.players[bot_id].addedAsBot = True
+    game.players[bot_id].isReady = True
+
+    _save_game(db_client, game)
+    await connection_manager.broadcast(game.gameId, game)
+
+    return JoinGameResponse(new_player_id=bot_id, game_state=game)
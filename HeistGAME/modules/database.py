@@ -1,14 +1,90 @@
 import redis
-import os 
+import os
+import time
+from redis.client import Pipeline
+from redis.cluster import RedisCluster, ClusterPipeline
+
+from .metrics import VALKEY_COMMAND_DURATION
+
+class TimedPipeline(Pipeline):
+    """
+    A pipeline that records its whole round trip as a single PIPELINE timing.
+    """
+    def execute(self, raise_on_error=True):
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            VALKEY_COMMAND_DURATION.labels("PIPELINE").observe(time.perf_counter() - start)
+
+class TimedValkey(redis.Redis):
+    """
+    A Valkey client that records the round-trip time of every command.
+    """
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            VALKEY_COMMAND_DURATION.labels(str(args[0]).upper()).observe(time.perf_counter() - start)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+class TimedClusterPipeline(ClusterPipeline):
+    def execute(self, raise_on_error=True):
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            VALKEY_COMMAND_DURATION.labels("PIPELINE").observe(time.perf_counter() - start)
+
+class TimedValkeyCluster(RedisCluster):
+    """
+    TimedValkey for a Valkey Cluster. Keys must follow the schema in keys.py, so
+    that each game's keys share a slot.
+    """
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            VALKEY_COMMAND_DURATION.labels(str(args[0]).upper()).observe(time.perf_counter() - start)
+
+    def pipeline(self, transaction=None, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        # Same pipeline, timed as a whole like TimedPipeline.
+        pipe.__class__ = TimedClusterPipeline
+        return pipe
 
 database_url = os.environ.get("DATABASE_URL")
 
-if database_url:
+# VALKEY_CLUSTER=true connects to a Valkey Cluster (DATABASE_URL or VALKEY_HOST/PORT
+# naming any node). Transactions then only span the keys of a single game.
+CLUSTER_MODE = os.environ.get("VALKEY_CLUSTER", "false").lower() == "true"
+
+if os.environ.get("VALKEY_BACKEND") == "memory":
+    # Load tests and local runs without a server: an in-process stand-in. Adding
+    # VALKEY_CLUSTER=true runs the cluster-mode write path against it.
+    try:
+        import fakeredis
+    except ImportError:
+        raise RuntimeError("VALKEY_BACKEND=memory requires the 'fakeredis[lua]' package.")
+    valkey_client = TimedValkey(connection_pool=fakeredis.FakeRedis(decode_responses=True).connection_pool)
+elif CLUSTER_MODE and database_url:
+    valkey_client = TimedValkeyCluster.from_url(database_url, decode_responses=True)
+elif CLUSTER_MODE:
+    valkey_client = TimedValkeyCluster(
+        host=os.environ.get("VALKEY_HOST", "localhost"),
+        port=int(os.environ.get("VALKEY_PORT", 6379)),
+        decode_responses=True
+    )
+elif database_url:
     # Production: Use the full Redis URL from Render
-    valkey_client = redis.from_url(database_url, decode_responses=True)
+    valkey_client = TimedValkey.from_url(database_url, decode_responses=True)
 else:
     # Local development: Use individual host/port settings
-    valkey_client = redis.Redis(
+    valkey_client = TimedValkey(
         host=os.environ.get("VALKEY_HOST", "localhost"),
         port=int(os.environ.get("VALKEY_PORT", 6379)),
         db=0,
@@ -19,4 +95,4 @@ def get_valkey_client():
     """
     A dependency function to provide the Valkey client to your API endpoints.
     """
-    return valkey_client
\ No newline at end of file
+    return valkey_client
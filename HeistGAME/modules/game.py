@@ -1,21 +1,54 @@
 import uuid
+import hashlib
 import random
 import copy
-from fastapi import APIRouter, HTTPException, Query, Body, WebSocket, Depends, Response
+import json
+from fastapi import APIRouter, HTTPException, Query, Body, Header, WebSocket, Depends, Response
 from fastapi.encoders import jsonable_encoder
-from typing import Dict, List
-from .database import get_valkey_client
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from .database import get_valkey_client, CLUSTER_MODE
+from . import keys
+from .archive import game_archiver
+from .stats import queue_game_stats
+from .profiling import profiler
+from .rate_limit import rate_limited
+from .sharding import shard_coordinator, SHARDING_ENABLED, WS_REDIRECT_CODE
+from .metrics import Gauge, BROADCAST_DURATION, BROADCAST_BYTES, BROADCASTS_COALESCED, PHASE_DURATION
 import asyncio
-from redis import Redis as Valkey  # Use Redis type hint, aliased for clarity
+import os
+import time
+import logging
+from redis import Redis as Valkey, WatchError  # Use Redis type hint, aliased for clarity
 
-from .game_models import GameState, Player, GameStatus, Role, Phase, ProposeTeamRequest, SubmitVoteRequest, VoteChoice, Winner, MissionChoice, PlayMissionCardRequest, Mission, JoinGameResponse, LogEntry, SendChatRequest, ChatMessage, KickPlayerRequest
+from .game_models import GameState, Player, GameStatus, Role, Phase, ProposeTeamRequest, SubmitVoteRequest, VoteChoice, Winner, MissionChoice, PlayMissionCardRequest, Mission, JoinGameResponse, LogEntry, LogEvent, SendChatRequest, ChatMessage, KickPlayerRequest, LiveGameSummary
+
+logger = logging.getLogger(__name__)
 
 # --- Real-time Connection Management ---
 
+# Broadcasts for the same game within this window go out once, with the latest state.
+BROADCAST_COALESCE_MS = float(os.environ.get("BROADCAST_COALESCE_MS", 5))
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, coalesce_ms: float = BROADCAST_COALESCE_MS):
         # {game_id: {player_id: WebSocket}}
         self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+        # {game_id: {WebSocket}} for read-only spectators
+        self.spectators: Dict[str, Set[WebSocket]] = {}
+        # Callbacks notified with (game_id, game_state) on every broadcast,
+        # whether or not anyone is connected to the game.
+        self.listeners: List[Callable[[str, GameState], None]] = []
+        self.coalesce_seconds = coalesce_ms / 1000
+        # {game_id: latest state waiting for the coalescing window to close}
+        self._pending: Dict[str, GameState] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        # Set when the server is shutting down: no new connections, and disconnects
+        # are not treated as players leaving.
+        self.draining = False
+
+    def add_listener(self, listener: Callable[[str, GameState], None]):
+        self.listeners.append(listener)
 
     async def connect(self, game_id: str, player_id: str, websocket: WebSocket):
         await websocket.accept()
@@ -23,48 +56,318 @@ class ConnectionManager:
             self.active_connections[game_id] = {}
         self.active_connections[game_id][player_id] = websocket
 
+    def attach(self, game_id: str, player_id: str, connection: "SSEConnection"):
+        """
+        Registers an already open, non-WebSocket connection for a player.
+        """
+        self.active_connections.setdefault(game_id, {})[player_id] = connection
+
     def disconnect(self, game_id: str, player_id: str):
         if game_id in self.active_connections and player_id in self.active_connections[game_id]:
             del self.active_connections[game_id][player_id]
 
+    async def connect_spectator(self, game_id: str, websocket: WebSocket):
+        await websocket.accept()
+        self.spectators.setdefault(game_id, set()).add(websocket)
+
+    def disconnect_spectator(self, game_id: str, websocket: WebSocket):
+        watchers = self.spectators.get(game_id)
+        if watchers is not None:
+            watchers.discard(websocket)
+            if not watchers:
+                del self.spectators[game_id]
+
+    @staticmethod
+    def public_view(game_state: GameState, base_message: dict = None) -> str:
+        """
+        Encodes the spectator view of a game: while it is in progress, every role
+        and mission choice is hidden.
+        """
+        message = dict(base_message if base_message is not None else jsonable_encoder(game_state))
+        if game_state.status == GameStatus.IN_PROGRESS:
+            message["players"] = {
+                p_id: {**{k: v for k, v in p_data.items() if k != "failCardsPlayed"}, "role": None, "missionChoice": None}
+                for p_id, p_data in message["players"].items()
+            }
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    @staticmethod
+    def player_view(game_state: GameState, player_id: str, base_message: dict = None) -> str:
+        """
+        Encodes the game as one player may see it: while it is in progress, other
+        players' mission choices are hidden, and their roles unless both are agents.
+        """
+        # Deep copy the message to avoid modifying the base for other players
+        player_specific_message = copy.deepcopy(base_message if base_message is not None else jsonable_encoder(game_state))
+
+        # --- Only redact information if the game is in progress ---
+        if game_state.status == GameStatus.IN_PROGRESS:
+            # Determine the set of agent IDs for this game, if roles are assigned
+            agent_ids = {
+                p_id for p_id, p_data in game_state.players.items() if p_data.role == Role.AGENT
+            }
+
+            # The player receiving the message
+            recipient_player = game_state.players.get(player_id)
+            is_recipient_agent = recipient_player and recipient_player.role == Role.AGENT
+
+            # Redact roles from other players based on the rules
+            for p_id_to_check, p_data_to_check in player_specific_message["players"].items():
+                # A player can always see their own role and mission choice.
+                if p_id_to_check == player_id:
+                    continue
+
+                # Redact mission choice for everyone else. This is critical for game security.
+                p_data_to_check["missionChoice"] = None
+                p_data_to_check.pop("failCardsPlayed", None)
+
+                # An agent can see other agents' roles
+                if is_recipient_agent and p_id_to_check in agent_ids:
+                    continue
+                # Otherwise, redact the role
+                p_data_to_check["role"] = None
+
+        # Encoded the same way as WebSocket.send_json, so the payload size can be recorded.
+        return json.dumps(player_specific_message, separators=(",", ":"), ensure_ascii=False)
+
+    async def _send_to_spectators(self, game_id: str, text: str) -> int:
+        watchers = list(self.spectators.get(game_id, ()))
+        results = await asyncio.gather(*(ws.send_text(text) for ws in watchers), return_exceptions=True)
+        for ws, result in zip(watchers, results):
+            if isinstance(result, Exception):
+                self.disconnect_spectator(game_id, ws)
+        return len(text.encode("utf-8")) * len(watchers)
+
     async def broadcast(self, game_id: str, game_state: GameState):
-        if game_id in self.active_connections:
+        """
+        Queues the state for every client of the game. Further broadcasts within the
+        coalescing window replace it, so only the latest state is sent.
+        """
+        if self.coalesce_seconds <= 0:
+            await self._send_now(game_id, game_state)
+            return
+        if game_id in self._pending:
+            BROADCASTS_COALESCED.inc()
+        self._pending[game_id] = game_state
+        if game_id not in self._flush_tasks:
+            self._flush_tasks[game_id] = asyncio.create_task(self._flush_later(game_id))
+
+    async def _flush_later(self, game_id: str):
+        await asyncio.sleep(self.coalesce_seconds)
+        self._flush_tasks.pop(game_id, None)
+        game_state = self._pending.pop(game_id, None)
+        if game_state is not None:
+            await self._send_now(game_id, game_state)
+
+    async def flush(self, game_id: str):
+        """
+        Sends a queued broadcast immediately, e.g. before the game's sockets are closed.
+        """
+        task = self._flush_tasks.pop(game_id, None)
+        if task is not None:
+            task.cancel()
+        game_state = self._pending.pop(game_id, None)
+        if game_state is not None:
+            await self._send_now(game_id, game_state)
+
+    async def drain(self, close_code: int = 1012):
+        """
+        Delivers any queued broadcasts, tells every client to reconnect to another
+        instance and closes its connection (1012: service restart).
+        """
+        self.draining = True
+        for game_id in list(self._pending):
+            await self.flush(game_id)
+        frame = json.dumps({"type": "reconnect"})
+        connections = [ws for conns in self.active_connections.values() for ws in conns.values()]
+        connections += [ws for watchers in self.spectators.values() for ws in watchers]
+
+        async def close(ws):
+            await ws.send_text(frame)
+            await ws.close(code=close_code)
+
+        await asyncio.gather(*(close(ws) for ws in connections), return_exceptions=True)
+        return len(connections)
+
+    async def redirect_moved_games(self) -> int:
+        """
+        Sharded mode: closes the connections of games another node now owns with
+        code 4307 and the owner's URL as the reason, so clients reconnect there.
+        They are unregistered first, so the closes are not treated as players leaving.
+        """
+        closed = 0
+        for game_id in set(self.active_connections) | set(self.spectators):
+            owner_url = shard_coordinator.owner_url(game_id)
+            if owner_url is None:
+                continue
+            await self.flush(game_id)
+            connections = list(self.active_connections.pop(game_id, {}).values())
+            connections += self.spectators.pop(game_id, ())
+            await asyncio.gather(*(ws.close(code=WS_REDIRECT_CODE, reason=owner_url) for ws in connections),
+                                 return_exceptions=True)
+            closed += len(connections)
+        return closed
+
+    async def _send_now(self, game_id: str, game_state: GameState):
+        with profiler.profile("broadcast"):
+            await self._broadcast(game_id, game_state)
+
+    async def _broadcast(self, game_id: str, game_state: GameState):
+        if game_id in self.active_connections or game_id in self.spectators:
+            start = time.perf_counter()
+            sent_bytes = 0
             # Create a base message that can be modified
             base_message = jsonable_encoder(game_state)
 
-            for player_id, websocket in self.active_connections[game_id].items():
-                # Deep copy the message to avoid modifying the base for other players
-                player_specific_message = copy.deepcopy(base_message)
+            # Spectators share one encoded public view instead of a per-recipient copy.
+            if game_id in self.spectators:
+                sent_bytes += await self._send_to_spectators(game_id, self.public_view(game_state, base_message))
 
-                # --- Only redact information if the game is in progress ---
-                if game_state.status == GameStatus.IN_PROGRESS:
-                    # Determine the set of agent IDs for this game, if roles are assigned
-                    agent_ids = {
-                        p_id for p_id, p_data in game_state.players.items() if p_data.role == Role.AGENT
-                    }
+            for player_id, websocket in list(self.active_connections.get(game_id, {}).items()):
+                text = self.player_view(game_state, player_id, base_message)
+                sent_bytes += len(text.encode("utf-8"))
+                try:
+                    await websocket.send_text(text)
+                except Exception:
+                    # The socket is closing; its own endpoint handles the exit.
+                    logger.debug("Dropped broadcast to closing socket", extra={"game_id": game_id, "player_id": player_id})
 
-                    # The player receiving the message
-                    recipient_player = game_state.players.get(player_id)
-                    is_recipient_agent = recipient_player and recipient_player.role == Role.AGENT
+            BROADCAST_DURATION.observe(time.perf_counter() - start)
+            BROADCAST_BYTES.observe(sent_bytes)
 
-                    # Redact roles from other players based on the rules
-                    for p_id_to_check, p_data_to_check in player_specific_message["players"].items():
-                        # A player can always see their own role and mission choice.
-                        if p_id_to_check == player_id:
-                            continue
+        for listener in self.listeners:
+            listener(game_id, game_state)
 
-                        # Redact mission choice for everyone else. This is critical for game security.
-                        p_data_to_check["missionChoice"] = None
+connection_manager = ConnectionManager()
 
-                        # An agent can see other agents' roles
-                        if is_recipient_agent and p_id_to_check in agent_ids:
-                            continue
-                        # Otherwise, redact the role
-                        p_data_to_check["role"] = None
 
-                await websocket.send_json(player_specific_message)
+class SSEConnection:
+    """
+    A Server-Sent Events stream standing in for a player's WebSocket. It is held in
+    ConnectionManager.active_connections like a socket; frames are queued here and
+    written out by the streaming endpoint.
+    """
+    # Every frame is a full snapshot, so a slow reader only ever needs the newest ones.
+    MAX_QUEUED = 8
 
-connection_manager = ConnectionManager()
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(self.MAX_QUEUED)
+
+    @staticmethod
+    def event_id(text: str) -> str:
+        """
+        Identifies a snapshot by its content, so a resuming client can be checked
+        against the current state on any worker.
+        """
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+    @classmethod
+    def format_event(cls, text: str) -> str:
+        return f"id: {cls.event_id(text)}\ndata: {text}\n\n"
+
+    async def send_text(self, text: str):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(text)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+# --- Phase Timers ---
+# Timed phases (agent reveal, vote reveal, mission reveal) end through a timer task
+# that sleeps until the deadline, then runs the phase's conclusion. Timers are
+# described by (kind, game_id, deadline) so that a draining instance can persist
+# them in Valkey and another instance can pick them up where they left off.
+
+# {task: (kind, game_id, deadline as a Unix timestamp)}
+_phase_timers: Dict[asyncio.Task, Tuple[str, str, float]] = {}
+
+def _start_phase_timer(kind: str, game_id: str, delay: float = 0.0, deadline: Optional[float] = None):
+    """
+    Schedules the conclusion of a timed phase. While the server drains, the timer
+    is handed off to Valkey instead of being started here.
+    """
+    if deadline is None:
+        deadline = time.time() + delay
+    if connection_manager.draining:
+        get_valkey_client().zadd(keys.PHASE_TIMERS, {f"{kind}:{game_id}": deadline})
+        return
+    task = asyncio.create_task(_run_phase_timer(kind, game_id, deadline))
+    _phase_timers[task] = (kind, game_id, deadline)
+    task.add_done_callback(lambda t: _phase_timers.pop(t, None))
+
+async def _run_phase_timer(kind: str, game_id: str, deadline: float):
+    await asyncio.sleep(max(0.0, deadline - time.time()))
+    await PHASE_CONCLUSIONS[kind](game_id)
+
+def persist_phase_timers(db_client: Valkey, moved_only: bool = False) -> int:
+    """
+    Cancels every pending timer on this instance (or only those of games another
+    node now owns) and stores it in Valkey for another instance to resume. Returns
+    the number of timers handed off.
+    """
+    pending = {task: timer for task, timer in _phase_timers.items()
+               if not moved_only or not shard_coordinator.is_local(timer[1])}
+    for task in pending:
+        task.cancel()
+    if pending:
+        db_client.zadd(keys.PHASE_TIMERS, {f"{kind}:{game_id}": deadline for kind, game_id, deadline in pending.values()})
+    return len(pending)
+
+def resume_phase_timers(db_client: Valkey) -> int:
+    """
+    Claims timers handed off by other instances and starts them here. Each timer is
+    claimed by exactly one instance (whichever removes it from the set first).
+    """
+    resumed = 0
+    for member, deadline in db_client.zrange(keys.PHASE_TIMERS, 0, -1, withscores=True):
+        kind, game_id = member.split(":", 1)
+        if not shard_coordinator.is_local(game_id) or not db_client.zrem(keys.PHASE_TIMERS, member):
+            continue
+        _start_phase_timer(kind, game_id, deadline=deadline)
+        resumed += 1
+    return resumed
+
+# {game_id: (phase label, time it was entered)}, used to time phase transitions.
+_phase_entered: Dict[str, tuple] = {}
+
+def _observe_phase_transition(game_id: str, game: GameState):
+    label = game.phase.value if game.status == GameStatus.IN_PROGRESS else game.status.value
+    previous = _phase_entered.get(game_id)
+    if previous is not None and previous[0] == label:
+        return
+    now = time.monotonic()
+    if previous is not None:
+        PHASE_DURATION.labels(previous[0], label).observe(now - previous[1])
+        logger.debug(f"Phase {previous[0]} -> {label}", extra={
+            "game_id": game_id, "phase": label, "duration_ms": round((now - previous[1]) * 1000, 2),
+        })
+    if game.status == GameStatus.FINISHED:
+        _phase_entered.pop(game_id, None)
+    else:
+        _phase_entered[game_id] = (label, now)
+
+connection_manager.add_listener(_observe_phase_transition)
+
+async def _hand_off_moved_games():
+    """
+    After a shard ring change: passes the timers and clients of games another node
+    now owns over to it.
+    """
+    handed_off = persist_phase_timers(get_valkey_client(), moved_only=True)
+    redirected = await connection_manager.redirect_moved_games()
+    if handed_off or redirected:
+        logger.info(f"Ring change: handed off {handed_off} phase timer(s), redirected {redirected} connection(s)")
+
+shard_coordinator.add_listener(_hand_off_moved_games)
+
+Gauge("heist_active_sockets", "Open sockets held by the ConnectionManager.", lambda: {
+    ("player",): sum(len(c) for c in connection_manager.active_connections.values()),
+    ("spectator",): sum(len(c) for c in connection_manager.spectators.values()),
+}, ("kind",))
+Gauge("heist_pending_phase_timers", "Phase-conclusion tasks waiting to fire.", lambda: {(): len(_phase_timers)})
 
 
 
@@ -100,6 +403,31 @@ CHAT_COLORS = [
 
 AVAILABLE_CHARACTERS = [f"char{i}" for i in range(1, 9)]
 
+# Finished games are archived to disk, so Valkey only keeps them around long
+# enough for the host to reset the lobby.
+FINISHED_GAME_TTL = int(os.environ.get("FINISHED_GAME_TTL", 3600))
+
+MAX_PLAYERS = 8
+
+# How long the timed reveal phases are shown before the game moves on.
+# Load tests shorten these to play games back to back.
+AGENT_REVEAL_SECONDS = float(os.environ.get("AGENT_REVEAL_SECONDS", 7))
+VOTE_REVEAL_SECONDS = float(os.environ.get("VOTE_REVEAL_SECONDS", 4))
+MISSION_REVEAL_SECONDS = float(os.environ.get("MISSION_REVEAL_SECONDS", 6))
+
+# When a non-host player drops out of a game in progress, a bot plays their seat.
+BOT_TAKEOVER_ON_DISCONNECT = os.environ.get("BOT_TAKEOVER_ON_DISCONNECT", "true").lower() == "true"
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header covers the given ETag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
 def _get_next_mastermind(game: GameState) -> str:
     """
     Determines the next Mastermind using the established playerOrder.
@@ -123,11 +451,372 @@ def _get_next_mastermind(game: GameState) -> str:
             
     return "" # Fallback if no one is online
 
-def _log_event(game: GameState, message: str):
+def _tally_votes(game: GameState) -> tuple:
+    """
+    Counts the team vote. Players who did not vote count as rejections.
+    Returns (approve_votes, reject_votes).
+    """
+    approve_votes = sum(1 for v in game.votes.values() if v == VoteChoice.APPROVE)
+    return approve_votes, len(game.players) - approve_votes
+
+def _tally_mission(game: GameState):
+    """
+    Determines the mission outcome once every team member has played a card.
+    Returns (result, fail_cards_played), or None while cards are still missing.
+    """
+    mission_team_choices = [game.players[pid].missionChoice for pid in game.proposedTeam]
+    if None in mission_team_choices:
+        return None
+
+    fail_cards_played = mission_team_choices.count(MissionChoice.FAIL) # This is safe because only Agents can play FAIL
+
+    # Determine if the mission failed based on the rules
+    is_special_mission_4 = game.missionNumber == 4 and len(game.players) >= 7
+    mission_failed = (is_special_mission_4 and fail_cards_played >= 2) or \
+                     (not is_special_mission_4 and fail_cards_played >= 1)
+
+    mission_result = MissionChoice.FAIL if mission_failed else MissionChoice.SUCCESS
+    return mission_result, fail_cards_played
+
+def _log_event(game: GameState, event: LogEvent, player_ids: List[str] = (), numbers: List[int] = (),
+               departed: List[str] = ()):
+    """
+    Adds a new entry to the game log. Players are recorded by seat, or by display
+    name once they no longer have one (`departed`); the client renders the text.
+    """
+    game.gameLog.append(LogEntry(
+        offsetMs=int((datetime.utcnow() - game.createdAt).total_seconds() * 1000),
+        event=event,
+        seats=[game.playerOrder.index(pid) for pid in player_ids] + [-i for i in range(1, len(departed) + 1)],
+        numbers=list(numbers),
+        names=list(departed),
+    ))
+
+def _remove_seat(game: GameState, player_id: str):
+    """
+    Takes a player out of playerOrder. Log entries that refer to them by seat keep
+    their display name instead, and later seats move down by one.
+    """
+    seat = game.playerOrder.index(player_id)
+    display_name = game.players[player_id].displayName
+    game.playerOrder.pop(seat)
+    for entry in game.gameLog:
+        if not entry.seats:
+            continue
+        if seat in entry.seats:
+            entry.names.append(display_name)
+        departed = -len(entry.names)
+        entry.seats = [departed if s == seat else s - 1 if s > seat else s for s in entry.seats]
+
+def _build_new_game(host_display_name: str, is_public: bool) -> GameState:
+    """
+    Builds a fresh lobby in memory with the host as its only player.
+    """
+    game_id = shard_coordinator.new_game_id()
+    host_id = str(uuid.uuid4())
+
+    # FIX: Assign a character to the host upon creation
+    host_character = random.choice(AVAILABLE_CHARACTERS)
+    # NEW: Assign a chat color to the host
+    host_color = random.choice(CHAT_COLORS)
+
+    host_player = Player(
+        uid=host_id,
+        displayName=host_display_name,
+        character=host_character,
+        chatColor=host_color,
+        isReady=True # The host is always ready
+    )
+
+    return GameState(
+        gameId=game_id,
+        hostId=host_id,
+        players={host_id: host_player},
+        isPublic=is_public,
+        playerOrder=[host_id]
+    )
+
+def _add_player(game: GameState, display_name: str) -> str:
+    """
+    Validates that the lobby can take another player and adds them to it.
+    Returns the new player's UID.
+    """
+    if game.status != GameStatus.LOBBY:
+        raise HTTPException(status_code=400, detail="Game is already in progress.")
+
+    if len(game.players) >= MAX_PLAYERS:
+        raise HTTPException(status_code=400, detail="Game lobby is full.")
+
+    new_player_id = str(uuid.uuid4())
+
+    used_characters = {p.character for p in game.players.values() if p.character is not None}
+    available = [char for char in AVAILABLE_CHARACTERS if char not in used_characters]
+
+    if not available:
+        raise HTTPException(status_code=500, detail="No available characters.")
+
+    # NEW: Assign a chat color to the new player
+    used_colors = {p.chatColor for p in game.players.values() if p.chatColor}
+    available_colors = [color for color in CHAT_COLORS if color not in used_colors]
+    assigned_color = available_colors[0] if available_colors else random.choice(CHAT_COLORS)
+
+    new_player = Player(
+        uid=new_player_id,
+        displayName=display_name,
+        character=available[0],
+        chatColor=assigned_color
+    )
+    game.players[new_player_id] = new_player
+    game.playerOrder.append(new_player_id)
+
+    _log_event(game, LogEvent.PLAYER_JOINED, [new_player_id])
+    return new_player_id
+
+def _join_lobby(db_client: Valkey, game: GameState, display_name: str) -> Tuple[GameState, str]:
+    """
+    Adds a player to a lobby and saves it. If another request wrote the lobby in
+    the meantime, the join is applied again to the new state rather than failing.
+    Returns the saved game and the new player's ID.
+    """
+    game_id = game.gameId
+    while True:
+        new_player_id = _add_player(game, display_name)
+        try:
+            _save_game(db_client, game)
+            return game, new_player_id
+        except GameChanged:
+            game = _load_game(db_client, game_id)
+            if not game:
+                raise HTTPException(status_code=404, detail=f"Game with ID '{game_id}' not found.")
+
+def _write_game(pipe, game: GameState, indexes=None):
+    """
+    Queues the commands that persist a game onto a Valkey pipeline.
+    Finished games expire after FINISHED_GAME_TTL; any later save of a non-finished
+    state (e.g. a reset) clears the expiry again. Public lobbies are also kept in
+    the lobby list and the fill-level index used by matchmaking; those writes go
+    to `indexes` when given, as they are outside the game's cluster slot.
+    Returns the JSON written, for remember_game once the pipeline has run.
+    """
+    ttl = FINISHED_GAME_TTL if game.status == GameStatus.FINISHED else None
+    game_json = game.model_dump_json()
+    pipe.set(keys.game_state(game.gameId), game_json, ex=ttl)
+    pipe.incr(keys.game_version(game.gameId))
+    if ttl:
+        pipe.expire(keys.game_version(game.gameId), ttl)
+    else:
+        pipe.persist(keys.game_version(game.gameId))
+
+    indexes = pipe if indexes is None else indexes
+    shard = keys.lobby_shard(game.gameId)
+    if game.isPublic and game.status == GameStatus.LOBBY:
+        indexes.sadd(keys.public_lobbies(shard), game.gameId)
+        indexes.zadd(keys.lobby_fill(shard), {game.gameId: len(game.players)})
+        indexes.incr(keys.LOBBY_LIST_VERSION)
+    elif game.isPublic:
+        indexes.zrem(keys.lobby_fill(shard), game.gameId)
+    return game_json
+
+def _unlist_lobby(pipe, game: GameState):
+    """
+    Queues the removal of a public game from the lobby list and the fill-level index.
+    """
+    shard = keys.lobby_shard(game.gameId)
+    pipe.srem(keys.public_lobbies(shard), game.gameId)
+    pipe.zrem(keys.lobby_fill(shard), game.gameId)
+    pipe.incr(keys.LOBBY_LIST_VERSION)
+
+# --- Live Game Index ---
+# A summary of every unfinished game this process has written, updated after each
+# committed write, so the admin view never has to SCAN Valkey or parse states.
+# With several workers or nodes, each one lists the games it wrote itself.
+
+class LiveGameIndex:
+    def __init__(self):
+        self._games: Dict[str, LiveGameSummary] = {}
+
+    def update(self, game: GameState, game_json: str):
+        if game.status == GameStatus.FINISHED:
+            self._games.pop(game.gameId, None)
+            return
+        self._games[game.gameId] = LiveGameSummary(
+            gameId=game.gameId,
+            status=game.status,
+            phase=game.phase if game.status == GameStatus.IN_PROGRESS else None,
+            isPublic=game.isPublic,
+            players=len(game.players),
+            online=sum(1 for p in game.players.values() if p.isOnline),
+            bots=sum(1 for p in game.players.values() if p.isBot),
+            lastActivity=time.time(),
+            sizeBytes=len(game_json),
+        )
+
+    def remove(self, game_id: str):
+        self._games.pop(game_id, None)
+
+    def snapshot(self) -> List[LiveGameSummary]:
+        """
+        Returns the summaries with the current socket counts filled in.
+        """
+        return [
+            summary.model_copy(update={
+                "sockets": len(connection_manager.active_connections.get(game_id, ())),
+                "spectators": len(connection_manager.spectators.get(game_id, ())),
+            })
+            for game_id, summary in list(self._games.items())
+        ]
+
+live_games = LiveGameIndex()
+
+def remember_game(game: GameState, game_json: str, version: int):
+    """
+    Updates the live game index after a successful write, and keeps the game hot
+    in memory if this node owns it (sharded mode).
+    """
+    live_games.update(game, game_json)
+    if game.status == GameStatus.FINISHED:
+        shard_coordinator.forget(game.gameId)
+    else:
+        shard_coordinator.remember(game.gameId, game_json, version)
+
+def forget_game(game_id: str):
+    live_games.remove(game_id)
+    shard_coordinator.forget(game_id)
+
+def _load_game(db_client: Valkey, game_id: str) -> Optional[GameState]:
+    """
+    Loads a game, from memory when this node holds it hot. Lobbies, and every game
+    when sharded, keep the version they were loaded at, so that their next save
+    cannot overwrite a concurrent one.
+    """
+    entry = shard_coordinator.hot_game(game_id)
+    if entry is None:
+        entry = db_client.mget(keys.game_state(game_id), keys.game_version(game_id))
+    game_json, version = entry
+    if not game_json:
+        return None
+    game = GameState.model_validate_json(game_json)
+    if version and (SHARDING_ENABLED or game.status == GameStatus.LOBBY):
+        game._version = int(version)
+    return game
+
+class GameChanged(HTTPException):
     """
-    Adds a new entry to the game log.
+    Raised by UnitOfWork when a checked game was written since it was loaded.
     """
-    game.gameLog.append(LogEntry(message=message))
+    def __init__(self, game_id: str):
+        super().__init__(status_code=409, detail=f"Game '{game_id}' changed while this request was handled; please retry.")
+
+class UnitOfWork:
+    """
+    Collects every Valkey write of one action (game state, lobby indexes, stats)
+    and sends them when the `with` block exits. Nothing is written if the block raises.
+
+    On a single Valkey node everything is one MULTI/EXEC: one round trip, and all
+    keys change together. A cluster transaction cannot span slots, so there each
+    game's own keys get a MULTI/EXEC on the game's slot, and `pipe` (lobby indexes,
+    stats, tournaments) is sent as a plain pipeline once those have committed.
+
+    Saving a game that carries a loaded version (a lobby, or any game when sharded,
+    see _load_game) first
+    WATCHes the game's version and checks it still matches, which costs two more
+    round trips. If another request wrote the game in between, GameChanged (409)
+    is raised and nothing is written.
+    """
+    def __init__(self, db_client: Valkey):
+        self._db_client = db_client
+        self.pipe = db_client.pipeline(transaction=not CLUSTER_MODE)
+        self._game_pipes: Dict[str, object] = {} # {game_id: pipeline its keys are written on}
+        # (pipeline, position of the game's version INCR in it, game, JSON written)
+        self._writes: List[Tuple[object, int, GameState, str]] = []
+        self._after_commit: List[Callable[[], None]] = []
+
+    def _game_pipe(self, game: GameState):
+        if game.gameId in self._game_pipes:
+            return self._game_pipes[game.gameId]
+        checked = game._version is not None
+        # A WATCH has to come before anything is queued, so on a single node a checked
+        # game that is not the first write gets a MULTI/EXEC of its own.
+        if CLUSTER_MODE or (checked and (len(self.pipe) or self.pipe in self._game_pipes.values())):
+            pipe = self._db_client.pipeline(transaction=True)
+        else:
+            pipe = self.pipe
+        if checked:
+            version_key = keys.game_version(game.gameId)
+            pipe.watch(version_key)
+            if int(pipe.get(version_key) or 0) != game._version:
+                shard_coordinator.forget(game.gameId)
+                raise GameChanged(game.gameId)
+            pipe.multi()
+        self._game_pipes[game.gameId] = pipe
+        return pipe
+
+    def save(self, game: GameState):
+        pipe = self._game_pipe(game)
+        # _write_game queues the state's SET, then the version's INCR.
+        position = len(pipe) + 1
+        self._writes.append((pipe, position, game, _write_game(pipe, game, self.pipe)))
+
+    def delete(self, game: GameState):
+        """
+        Removes a game and drops it from the lobby indexes.
+        """
+        self._game_pipe(game).delete(keys.game_state(game.gameId), keys.game_version(game.gameId))
+        if game.isPublic:
+            _unlist_lobby(self.pipe, game)
+        self.after_commit(lambda: forget_game(game.gameId))
+
+    def after_commit(self, callback: Callable[[], None]):
+        self._after_commit.append(callback)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Each game's own pipeline first, so `pipe` only goes out once those committed.
+        pipes = [pipe for pipe in self._game_pipes.values() if pipe is not self.pipe] + [self.pipe]
+        try:
+            if exc_type is None:
+                results = {}
+                for pipe in pipes:
+                    if len(pipe):
+                        try:
+                            results[id(pipe)] = pipe.execute()
+                        except WatchError:
+                            game_id = next(game_id for game_id, p in self._game_pipes.items() if p is pipe)
+                            shard_coordinator.forget(game_id)
+                            raise GameChanged(game_id)
+                for pipe, position, game, game_json in self._writes:
+                    version = results[id(pipe)][position]
+                    if game._version is not None:
+                        game._version = version
+                    remember_game(game, game_json, version)
+                for callback in self._after_commit:
+                    callback()
+        finally:
+            for pipe in pipes:
+                pipe.reset()
+        return False
+
+def _save_game(db_client: Valkey, game: GameState):
+    """
+    Writes the game state back to Valkey in a single round trip.
+    """
+    with UnitOfWork(db_client) as uow:
+        uow.save(game)
+
+def _queue_game_finished(uow: UnitOfWork, game: GameState):
+    """
+    Adds a finished game's stats (and tournament result) to the unit of work and
+    archives it once committed.
+    """
+    queue_game_stats(uow.pipe, game)
+    if game.tournamentId:
+        winning_role = {Winner.THIEVES: Role.THIEF, Winner.AGENTS: Role.AGENT}.get(game.winner)
+        winners = [pid for pid, p in game.players.items() if winning_role and p.role == winning_role]
+        # The first result counts, even if the host resets and replays the table.
+        uow.pipe.hsetnx(keys.tournament_results(game.tournamentId), game.gameId, json.dumps(winners))
+    uow.after_commit(lambda: game_archiver.submit(game))
 
 # NEW: Dependency to fetch and validate game state
 async def get_game_state_from_db(game_id: str) -> GameState:
@@ -138,29 +827,44 @@ async def get_game_state_from_db(game_id: str) -> GameState:
     and raising a 404 if not found.
     """
     db_client = get_valkey_client()
-    game_json = db_client.get(game_id)
-    if not game_json:
+    game = _load_game(db_client, game_id)
+    if not game:
         raise HTTPException(status_code=404, detail=f"Game with ID '{game_id}' not found.")
-    
-    game = GameState.model_validate_json(game_json)
     return game
 
 async def handle_player_exit(game_id: str, player_id: str, db_client: Valkey):
     """
     Handles all logic for a player leaving or disconnecting from a game.
     """
-    game_json = db_client.get(game_id)
-    if not game_json:
-        return
-
-    game = GameState.model_validate_json(game_json)
-    
+    while True:
+        game = _load_game(db_client, game_id)
+        if not game:
+            return
+        try:
+            return await _apply_player_exit(game, player_id, db_client)
+        except GameChanged:
+            # Another request wrote the lobby first: apply the exit to its state.
+            continue
+
+async def _apply_player_exit(game: GameState, player_id: str, db_client: Valkey):
+    game_id = game.gameId
     if player_id not in game.players or not game.players[player_id].isOnline:
         # Player already handled or not in game
         return
 
     exiting_player = game.players[player_id]
-    _log_event(game, f"{exiting_player.displayName} has left the game.")
+    logger.info("Player exited", extra={"game_id": game_id, "player_id": player_id, "phase": game.phase.value})
+
+    # Hand an in-progress seat to a bot instead of letting it drop the player count.
+    if (BOT_TAKEOVER_ON_DISCONNECT and game.status == GameStatus.IN_PROGRESS
+            and game.hostId != player_id and not exiting_player.isBot):
+        exiting_player.isBot = True
+        _log_event(game, LogEvent.BOT_TOOK_SEAT, [player_id])
+        _save_game(db_client, game)
+        await connection_manager.broadcast(game_id, game)
+        return
+
+    _log_event(game, LogEvent.PLAYER_LEFT, [player_id])
 
     # Mark player as offline
     game.players[player_id].isOnline = False
@@ -173,38 +877,43 @@ async def handle_player_exit(game_id: str, player_id: str, db_client: Valkey):
     if (is_host_leaving or not_enough_players) and game.status != GameStatus.FINISHED:
         # Host is leaving OR not enough players to continue, terminate the game.
         if is_host_leaving:
-            _log_event(game, "The host has left. The game has been terminated.")
+            _log_event(game, LogEvent.HOST_LEFT)
         else:
-            _log_event(game, "Not enough players to continue. The game has been terminated.")
+            _log_event(game, LogEvent.TOO_FEW_PLAYERS)
         
+        was_in_progress = game.status == GameStatus.IN_PROGRESS
         game.status = GameStatus.FINISHED
-        
-        # Broadcast the final "aborted" state
-        await connection_manager.broadcast(game_id, game)
-        
+
         # Clean up
-        db_client.delete(game_id)
-        if game.isPublic:
-            db_client.srem("public_lobbies", game_id)
-        
+        with UnitOfWork(db_client) as uow:
+            uow.delete(game)
+            if was_in_progress:
+                _queue_game_finished(uow, game)
+
+        # Broadcast the final "aborted" state, before the sockets below are closed
+        await connection_manager.broadcast(game_id, game)
+        await connection_manager.flush(game_id)
+
         # Disconnect everyone
         if game_id in connection_manager.active_connections:
             for ws in list(connection_manager.active_connections[game_id].values()):
                 await ws.close(code=1000) # Normal closure
             if game_id in connection_manager.active_connections:
                 del connection_manager.active_connections[game_id]
+        for ws in list(connection_manager.spectators.pop(game_id, ())):
+            await ws.close(code=1000)
         return
 
     # --- Game continues, handle turn progression if necessary ---
     # If the game is in the lobby, we just broadcast the new player status.
     if game.status == GameStatus.LOBBY:
-        db_client.set(game.gameId, game.model_dump_json())
+        _save_game(db_client, game)
         await connection_manager.broadcast(game_id, game)
         return
         
     # If the leaving player was on a mission in progress, void it.
     if game.phase == Phase.MISSION and game.proposedTeam and player_id in game.proposedTeam:
-        _log_event(game, "Mission aborted because a team member went offline.")
+        _log_event(game, LogEvent.MISSION_ABORTED)
         # This logic is the same as a rejected vote
         game.roundNumber += 1
         game.mastermindId = _get_next_mastermind(game)
@@ -213,22 +922,33 @@ async def handle_player_exit(game_id: str, player_id: str, db_client: Valkey):
     # If the leaving player was the mastermind, pass the turn.
     elif game.phase == Phase.TEAM_SELECTION and game.mastermindId == player_id:
         game.mastermindId = _get_next_mastermind(game)
-        _log_event(game, f"The Mastermind went offline. The new Mastermind is {game.players[game.mastermindId].displayName}.")
+        _log_event(game, LogEvent.MASTERMIND_OFFLINE, [game.mastermindId])
 
-    db_client.set(game.gameId, game.model_dump_json())
+    _save_game(db_client, game)
     await connection_manager.broadcast(game_id, game)
 
 router = APIRouter()
 
 # NEW: This function handles GET requests to list public games.
 @router.get("/games")
-async def get_public_games():
+async def get_public_games(response: Response, if_none_match: Optional[str] = Header(None)):
     """
     Retrieves a list of all public games that are currently in the LOBBY state.
     This is now highly efficient using a Valkey Set.
+    Answers 304 from the list version alone when the client's copy is current.
     """
     db_client = get_valkey_client()
-    public_game_ids = list(db_client.smembers("public_lobbies"))
+    etag = f'"lobbies-{db_client.get(keys.LOBBY_LIST_VERSION) or 0}"'
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+    # The list is sharded over several sets; read them all in one pipeline.
+    pipe = db_client.pipeline(transaction=False)
+    for shard in range(keys.LOBBY_INDEX_SHARDS):
+        pipe.smembers(keys.public_lobbies(shard))
+    public_game_ids = [game_id for members in pipe.execute() for game_id in members]
 
     public_lobbies = []
     if not public_game_ids:
@@ -236,9 +956,8 @@ async def get_public_games():
 
     # Fetch the full game objects for only the public lobby IDs
     for game_id in public_game_ids:
-        game_json = db_client.get(game_id)
-        if game_json:
-            game = GameState.model_validate_json(game_json)
+        game = _load_game(db_client, game_id)
+        if game:
             # Double-check status just in case of an orphaned entry
             if game.status == GameStatus.LOBBY:
                 public_lobbies.append({
@@ -251,65 +970,48 @@ async def get_public_games():
 
 
 @router.get("/games/{game_id}", response_model=GameState)
-async def get_game(game: GameState = Depends(get_game_state_from_db)):
+async def get_game(game_id: str, if_none_match: Optional[str] = Header(None)):
     """
     Retrieves the full state of a specific game.
-    The game state is fetched by the `get_game_state_from_db` dependency.
+    If the client already holds the current version, answers 304 without loading
+    the game. Otherwise the stored JSON is returned as is.
     """
-    return game
+    db_client = get_valkey_client()
+    version = db_client.get(keys.game_version(game_id))
+    if version and _etag_matches(if_none_match, f'"{version}"'):
+        return Response(status_code=304, headers={"ETag": f'"{version}"', "Cache-Control": "no-cache"})
+
+    # Read both together so the ETag always describes the body it is sent with.
+    game_json, version = db_client.mget(keys.game_state(game_id), keys.game_version(game_id))
+    if not game_json:
+        raise HTTPException(status_code=404, detail=f"Game with ID '{game_id}' not found.")
+    headers = {"Cache-Control": "no-cache"}
+    if version:
+        headers["ETag"] = f'"{version}"'
+    return Response(content=game_json, media_type="application/json", headers=headers)
 
 @router.post("/games/", response_model=GameState, status_code=201)
 async def create_game(
     host_display_name: str = Query(..., description="The display name of the player creating the game."),
     is_public: bool = Query(False, description="Whether the game should be listed publicly.")
 ):
-    print("--- CREATE GAME: START ---")
+    start = time.perf_counter()
     try:
         db_client = get_valkey_client()
-        print("--- CREATE GAME: Got Valkey client. ---")
-
-        game_id = str(uuid.uuid4())[:8]
-        host_id = str(uuid.uuid4())
-        print(f"--- CREATE GAME: Generated gameId: {game_id}, hostId: {host_id} ---")
-
-        # FIX: Assign a character to the host upon creation
-        host_character = random.choice(AVAILABLE_CHARACTERS)
-        # NEW: Assign a chat color to the host
-        host_color = random.choice(CHAT_COLORS)
-
-        host_player = Player(
-            uid=host_id,
-            displayName=host_display_name,
-            character=host_character,
-            chatColor=host_color,
-            isReady=True # The host is always ready
-        )
-
-        new_game = GameState(
-            gameId=game_id,
-            hostId=host_id,
-            players={host_id: host_player},
-            isPublic=is_public,
-            playerOrder=[host_id]
-        )
-        print("--- CREATE GAME: Created GameState object in memory. ---")
-
-        game_json = new_game.model_dump_json()
-        print("--- CREATE GAME: Serialized game state to JSON. ---")
 
-        db_client.set(new_game.gameId, game_json)
-        print(f"--- CREATE GAME: Successfully saved game {new_game.gameId} to Valkey. ---")
+        new_game = _build_new_game(host_display_name, is_public)
 
-        if new_game.isPublic:
-            db_client.sadd("public_lobbies", new_game.gameId)
-            print(f"--- CREATE GAME: Added game {new_game.gameId} to public lobbies set. ---")
+        _log_event(new_game, LogEvent.GAME_CREATED, [new_game.hostId])
+        _save_game(db_client, new_game)
 
-        _log_event(new_game, f"Game created by {host_player.displayName}.")
-        print("--- CREATE GAME: Returning response. ---")
+        logger.info("Game created", extra={
+            "game_id": new_game.gameId, "player_id": new_game.hostId,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        })
         return new_game
 
-    except Exception as e:
-        print(f"--- CREATE GAME: UNHANDLED EXCEPTION - {e} ---")
+    except Exception:
+        logger.exception("Create game failed")
         # Re-raise to ensure FastAPI returns a 500 error
         raise
 
@@ -318,67 +1020,30 @@ async def join_game(
     display_name: str = Query(..., description="The display name of the player joining the game."),
     game: GameState = Depends(get_game_state_from_db)
 ):
-    print("--- JOIN GAME: START ---")
+    start = time.perf_counter()
     try:
         # The game object is now provided by the dependency.
         # We still need a client to write the updated state back.
         db_client = get_valkey_client()
         game_id = game.gameId
-        print(f"--- JOIN GAME: Game state for {game_id} loaded from dependency. ---")
 
         if not hasattr(game, 'playerOrder') or game.playerOrder is None:
-            print("--- JOIN GAME: playerOrder missing, initializing as empty list. ---")
             game.playerOrder = []
 
-        if game.status != GameStatus.LOBBY:
-            print(f"--- JOIN GAME: ERROR - Game status is {game.status}, not LOBBY ---")
-            raise HTTPException(status_code=400, detail="Game is already in progress.")
-
-        if len(game.players) >= 8:
-            print("--- JOIN GAME: ERROR - Lobby is full ---")
-            raise HTTPException(status_code=400, detail="Game lobby is full.")
-
-        print("--- JOIN GAME: Validation passed, adding new player. ---")
-        new_player_id = str(uuid.uuid4())
-        
-        # The character assignment logic remains the same, but 'assigned_character'
-        # will now be an integer (e.g., 0, 1, 2) instead of a string.
-        used_characters = {p.character for p in game.players.values() if p.character is not None}
-        available = [char for char in AVAILABLE_CHARACTERS if char not in used_characters]
-
-        if not available:
-            raise HTTPException(status_code=500, detail="No available characters.")
-            
-        # NEW: Assign a chat color to the new player
-        used_colors = {p.chatColor for p in game.players.values() if p.chatColor}
-        available_colors = [color for color in CHAT_COLORS if color not in used_colors]
-        assigned_color = available_colors[0] if available_colors else random.choice(CHAT_COLORS)
-
-        assigned_character = available[0]
-
-        new_player = Player(
-            uid=new_player_id,
-            displayName=display_name,
-            character=assigned_character,
-            chatColor=assigned_color
-        )
-        game.players[new_player_id] = new_player
-        
-        print(f"--- JOIN GAME: Appending new player {new_player_id} to playerOrder. ---")
-        game.playerOrder.append(new_player_id)
-        
-        _log_event(game, f"{display_name} has joined the game.")
-        print("--- JOIN GAME: Saving updated game state to Valkey... ---")
-        db_client.set(game.gameId, game.model_dump_json())
-        print("--- JOIN GAME: Game state saved. Broadcasting update. ---")
-
+        game, new_player_id = _join_lobby(db_client, game, display_name)
         await connection_manager.broadcast(game_id, game)
-        print("--- JOIN GAME: Broadcast complete. Returning response. ---")
 
+        logger.info("Player joined", extra={
+            "game_id": game_id, "player_id": new_player_id,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        })
         return JoinGameResponse(new_player_id=new_player_id, game_state=game)
 
-    except Exception as e:
-        print(f"--- JOIN GAME: UNHANDLED EXCEPTION - {e} ---")
+    except HTTPException as e:
+        logger.info(f"Join rejected: {e.detail}", extra={"game_id": game.gameId})
+        raise
+    except Exception:
+        logger.exception("Join game failed", extra={"game_id": game.gameId})
         # Re-raise the exception to ensure FastAPI returns a 500 error
         raise
 
@@ -394,7 +1059,7 @@ async def leave_game(
     await handle_player_exit(game.gameId, player_id, db_client)
     return Response(status_code=204)
 
-@router.post("/games/{game_id}/ready", response_model=GameState)
+@router.post("/games/{game_id}/ready", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def toggle_ready_status(
     player_id: str = Body(..., embed=True, description="The UID of the player toggling their ready status."),
     game: GameState = Depends(get_game_state_from_db)
@@ -410,12 +1075,12 @@ async def toggle_ready_status(
     if player_id in game.players:
         player = game.players[player_id]
         player.isReady = not player.isReady
-        db_client.set(game.gameId, game.model_dump_json())
+        _save_game(db_client, game)
         await connection_manager.broadcast(game.gameId, game)
 
     return game
 
-@router.post("/games/{game_id}/kick", response_model=GameState)
+@router.post("/games/{game_id}/kick", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def kick_player(
     request: KickPlayerRequest,
     game: GameState = Depends(get_game_state_from_db)
@@ -439,16 +1104,15 @@ async def kick_player(
         raise HTTPException(status_code=400, detail="Host cannot kick themselves.")
 
     # --- Logic ---
-    kicked_player = game.players.pop(request.player_to_kick_id)
-    
     # Also remove from playerOrder
     if request.player_to_kick_id in game.playerOrder:
-        game.playerOrder.remove(request.player_to_kick_id)
+        _remove_seat(game, request.player_to_kick_id)
+    kicked_player = game.players.pop(request.player_to_kick_id)
 
-    _log_event(game, f"{kicked_player.displayName} was kicked by the host.")
+    _log_event(game, LogEvent.PLAYER_KICKED, departed=[kicked_player.displayName])
 
     # Save and broadcast to remaining players
-    db_client.set(game.gameId, game.model_dump_json())
+    _save_game(db_client, game)
     await connection_manager.broadcast(game.gameId, game)
 
     # Forcefully disconnect the kicked player
@@ -460,7 +1124,7 @@ async def kick_player(
 
     return game
 
-@router.post("/games/{game_id}/start", response_model=GameState)
+@router.post("/games/{game_id}/start", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def start_game(
     player_id: str = Body(..., embed=True, description="The UID of the host player starting the game."),
     game: GameState = Depends(get_game_state_from_db)
@@ -486,9 +1150,6 @@ async def start_game(
     if game.status != GameStatus.LOBBY:
         raise HTTPException(status_code=400, detail="Game has already started.")
 
-    # If this game was in the public list, remove it now that it's starting.
-    if game.isPublic:
-        db_client.srem("public_lobbies", game.gameId)
     # --- Game Start Logic ---
     player_ids = [pid for pid, p in game.players.items() if p.isOnline]
     random.shuffle(player_ids)
@@ -502,49 +1163,50 @@ async def start_game(
 
     game.phase = Phase.AGENT_REVEAL
     game.status = GameStatus.IN_PROGRESS
-    _log_event(game, "The game has started! Assigning roles...")
+    _log_event(game, LogEvent.GAME_STARTED)
     
     # --- Save the updated state back to Valkey ---
-    db_client.set(game.gameId, game.model_dump_json())
+    with UnitOfWork(db_client) as uow:
+        # If this game was in the public list, remove it now that it's starting.
+        if game.isPublic:
+            _unlist_lobby(uow.pipe, game)
+        uow.save(game)
 
     await connection_manager.broadcast(game.gameId, game)
 
-    # --- NEW: Start a background task to automatically move to the next phase ---
-    asyncio.create_task(handle_agent_reveal_conclusion(game.gameId, game))
+    # --- NEW: Start a timer to automatically move to the next phase ---
+    _start_phase_timer("agent_reveal", game.gameId, AGENT_REVEAL_SECONDS)
 
     return game
 
 
-async def handle_agent_reveal_conclusion(game_id: str, game: GameState):
+async def handle_agent_reveal_conclusion(game_id: str):
     """
     A helper function to manage the automatic transition after the agent reveal phase.
+    Runs once players have had AGENT_REVEAL_SECONDS to see their roles.
     """
-    # 1. Wait for a few seconds so players can see their roles
-    await asyncio.sleep(7)
-
-    # 2. Re-fetch the game state to prevent race conditions
+    # 1. Re-fetch the game state to prevent race conditions
     db_client = get_valkey_client()
-    game_json = db_client.get(game_id)
+    game = _load_game(db_client, game_id)
     # It's possible the game was reset during the sleep
-    if not game_json or GameState.model_validate_json(game_json).phase != Phase.AGENT_REVEAL:
+    if not game or game.phase != Phase.AGENT_REVEAL:
         return
-    game = GameState.model_validate_json(game_json)
 
-    # 3. Transition to the first round
+    # 2. Transition to the first round
     game.phase = Phase.TEAM_SELECTION
     player_ids = list(game.players.keys())
     game.mastermindId = random.choice(player_ids)
-    _log_event(game, f"Agents have been revealed. The first Mastermind is {game.players[game.mastermindId].displayName}.")
+    _log_event(game, LogEvent.AGENTS_REVEALED, [game.mastermindId])
     
     # --- Save the updated state back to Valkey ---
-    db_client.set(game.gameId, game.model_dump_json())
+    _save_game(db_client, game)
 
-    # 4. Broadcast the new state
+    # 3. Broadcast the new state
     await connection_manager.broadcast(game.gameId, game)
 
 
 
-@router.post("/games/{game_id}/propose-team", response_model=GameState)
+@router.post("/games/{game_id}/propose-team", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def propose_team(request: ProposeTeamRequest, game: GameState = Depends(get_game_state_from_db)):
     """
     The Mastermind proposes a team for the current mission.
@@ -581,11 +1243,10 @@ async def propose_team(request: ProposeTeamRequest, game: GameState = Depends(ge
     game.proposedTeam = request.team
     game.phase = Phase.TEAM_VOTE
     game.votes = {}  # Clear previous votes and prepare for new ones
-    team_names = ", ".join([game.players[p_id].displayName for p_id in request.team])
-    _log_event(game, f"{game.players[request.player_id].displayName} proposed a team: {team_names}.")
+    _log_event(game, LogEvent.TEAM_PROPOSED, [request.player_id, *request.team])
     
     # --- Save the updated state back to Valkey ---
-    db_client.set(game.gameId, game.model_dump_json())
+    _save_game(db_client, game)
 
 
     await connection_manager.broadcast(game.gameId, game)
@@ -595,24 +1256,33 @@ async def propose_team(request: ProposeTeamRequest, game: GameState = Depends(ge
 async def handle_mission_conclusion(game_id: str, game: GameState):
     """
     A helper function to manage the automatic transition after a mission reveal.
+    Saves the game together with the final card.
     """
     # 1. Transition to REVEAL and broadcast
     game.phase = Phase.REVEAL
     game.acknowledgements = [] # Reset acks for the mission reveal screen
     db_client = get_valkey_client()
-    db_client.set(game.gameId, game.model_dump_json())
+    with UnitOfWork(db_client) as uow:
+        uow.save(game)
+        if game.status == GameStatus.FINISHED:
+            _queue_game_finished(uow, game)
     await connection_manager.broadcast(game_id, game)
 
-    # 2. Wait for a few seconds so players can see the result
-    await asyncio.sleep(6) # Longer sleep for mission results
+    # 2. Give players a few seconds to see the result (longer than the other reveals)
+    if game.status != GameStatus.FINISHED:
+        _start_phase_timer("mission_reveal", game_id, MISSION_REVEAL_SECONDS)
 
-    # 3. Re-fetch the game state to prevent race conditions
-    game_json = db_client.get(game_id)
-    if not game_json or game.status == GameStatus.FINISHED:
+async def handle_mission_reveal_conclusion(game_id: str):
+    """
+    Moves the game on to the next mission once the mission reveal is over.
+    """
+    # 1. Re-fetch the game state to prevent race conditions
+    db_client = get_valkey_client()
+    game = _load_game(db_client, game_id)
+    if not game or game.status == GameStatus.FINISHED or game.phase != Phase.REVEAL:
         return
-    game = GameState.model_validate_json(game_json)
 
-    # 4. Transition to the next round
+    # 2. Transition to the next round
     game.missionNumber += 1
     game.roundNumber = 1 # Reset vote track for new mission
     game.mastermindId = _get_next_mastermind(game)
@@ -622,11 +1292,11 @@ async def handle_mission_conclusion(game_id: str, game: GameState):
     for p in game.players.values():
         p.missionChoice = None
 
-    # 5. Save and broadcast the final state
-    db_client.set(game.gameId, game.model_dump_json())
+    # 3. Save and broadcast the final state
+    _save_game(db_client, game)
     await connection_manager.broadcast(game_id, game)
 
-@router.post("/games/{game_id}/submit-vote", response_model=GameState)
+@router.post("/games/{game_id}/submit-vote", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def submit_vote(request: SubmitVoteRequest, game: GameState = Depends(get_game_state_from_db)):
     """
     A player casts their vote on the proposed team.
@@ -652,42 +1322,51 @@ async def submit_vote(request: SubmitVoteRequest, game: GameState = Depends(get_
 
     # --- Record the vote ---
     game.votes[request.player_id] = request.vote
-    
-    # --- Broadcast the intermediate state so players can see who has voted ---
-    # This is good for UX as it shows votes coming in live.
-    db_client.set(game.gameId, game.model_dump_json())
-    await connection_manager.broadcast(game.gameId, game)
 
-    # If this is the final vote, trigger the conclusion logic as a background task.
-    # This allows us to return an immediate response to the final voter.
+    # If this is the final vote, reveal the votes in the same write. The outcome is
+    # applied by a timer, so the final voter still gets an immediate response.
     if len(game.votes) == len(game.players):
-        asyncio.create_task(handle_vote_conclusion(game.gameId, game))
+        await handle_vote_conclusion(game.gameId, game)
+    else:
+        # --- Broadcast the intermediate state so players can see who has voted ---
+        # This is good for UX as it shows votes coming in live.
+        _save_game(db_client, game)
+        await connection_manager.broadcast(game.gameId, game)
 
-    # The immediate response is just the game state with the latest vote recorded.
-    # The final state change will come via WebSocket after the background task completes.
+    # The final state change will come via WebSocket once the vote reveal is over.
     return game
 
 async def handle_vote_conclusion(game_id: str, game: GameState):
     """
     A new helper function to manage the automatic transition after a vote.
+    Saves the game together with the final vote.
     """
     # 1. Transition to VOTE_REVEAL and broadcast
     game.phase = Phase.VOTE_REVEAL
     db_client = get_valkey_client()
-    db_client.set(game.gameId, game.model_dump_json())
+    _save_game(db_client, game)
     await connection_manager.broadcast(game_id, game)
 
-    # 2. Wait for a few seconds so players can see the result
-    await asyncio.sleep(4)
+    # 2. Give players a few seconds to see the result
+    _start_phase_timer("vote_reveal", game_id, VOTE_REVEAL_SECONDS)
 
-    # 3. Calculate the outcome and transition to the next phase
-    approve_votes = sum(1 for v in game.votes.values() if v == VoteChoice.APPROVE)
-    reject_votes = len(game.players) - approve_votes
+async def handle_vote_reveal_conclusion(game_id: str):
+    """
+    Applies the outcome of a vote once the vote reveal is over.
+    """
+    # 1. Re-fetch the game state to prevent race conditions
+    db_client = get_valkey_client()
+    game = _load_game(db_client, game_id)
+    if not game or game.status != GameStatus.IN_PROGRESS or game.phase != Phase.VOTE_REVEAL:
+        return
+
+    # 2. Calculate the outcome and transition to the next phase
+    approve_votes, reject_votes = _tally_votes(game)
     was_approved = approve_votes > reject_votes
 
     if was_approved:
         game.phase = Phase.MISSION
-        _log_event(game, f"Team approved ({approve_votes}-{reject_votes}). Mission starting.")
+        _log_event(game, LogEvent.TEAM_APPROVED, numbers=[approve_votes, reject_votes])
         if game.proposedTeam:
             for p_id in game.proposedTeam:
                 if game.players.get(p_id):
@@ -697,21 +1376,24 @@ async def handle_vote_conclusion(game_id: str, game: GameState):
         if game.roundNumber > 5:
             game.status = GameStatus.FINISHED
             game.winner = Winner.AGENTS
-            _log_event(game, "Team rejected 5 times in a row. Agents win!")
+            _log_event(game, LogEvent.FIFTH_REJECTION)
         else:
             game.mastermindId = _get_next_mastermind(game)
             game.phase = Phase.TEAM_SELECTION
-            _log_event(game, f"Team rejected ({approve_votes}-{reject_votes}). New mastermind is {game.players[game.mastermindId].displayName}.")
+            _log_event(game, LogEvent.TEAM_REJECTED, [game.mastermindId], [approve_votes, reject_votes])
         game.proposedTeam = None
 
     game.votes = {} # Reset votes for the next round
 
-    # 4. Save and broadcast the final state
-    db_client.set(game.gameId, game.model_dump_json())
+    # 3. Save and broadcast the final state
+    with UnitOfWork(db_client) as uow:
+        uow.save(game)
+        if game.status == GameStatus.FINISHED:
+            _queue_game_finished(uow, game)
     await connection_manager.broadcast(game_id, game)
 
 
-@router.post("/games/{game_id}/chat", response_model=GameState)
+@router.post("/games/{game_id}/chat", response_model=GameState, dependencies=[Depends(rate_limited("chat"))])
 async def send_chat_message(
     request: SendChatRequest,
     game: GameState = Depends(get_game_state_from_db)
@@ -742,12 +1424,12 @@ async def send_chat_message(
     game.chatHistory.append(chat_message)
 
     # Save and broadcast
-    db_client.set(game.gameId, game.model_dump_json())
+    _save_game(db_client, game)
     await connection_manager.broadcast(game.gameId, game)
 
     return game
 
-@router.post("/games/{game_id}/acknowledge-vote-reveal", response_model=GameState)
+@router.post("/games/{game_id}/acknowledge-vote-reveal", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def acknowledge_vote_reveal(
     player_id: str = Body(..., embed=True, description="The UID of the player acknowledging the vote results."),
     game: GameState = Depends(get_game_state_from_db)
@@ -775,13 +1457,12 @@ async def acknowledge_vote_reveal(
     # If all players have acknowledged, move to the next phase
     if len(game.acknowledgements) == len(game.players):
         # Re-calculate vote result to determine next phase
-        approve_votes = sum(1 for v in game.votes.values() if v == VoteChoice.APPROVE)
-        reject_votes = len(game.players) - approve_votes
+        approve_votes, reject_votes = _tally_votes(game)
 
         if approve_votes > reject_votes:
             # --- Team Approved: Move to MISSION ---
             game.phase = Phase.MISSION
-            _log_event(game, "Team was approved. Moving to mission phase.")
+            _log_event(game, LogEvent.TEAM_APPROVED, numbers=[approve_votes, reject_votes])
             # Clear mission choices for the players on the new mission
             for p_id in game.proposedTeam:
                 game.players[p_id].missionChoice = None
@@ -791,17 +1472,21 @@ async def acknowledge_vote_reveal(
             if game.roundNumber > 5:
                 game.status = GameStatus.FINISHED
                 game.winner = Winner.AGENTS
-                _log_event(game, "Team rejected 5 times in a row. Agents win!")
+                _log_event(game, LogEvent.FIFTH_REJECTION)
             else:
                 game.mastermindId = _get_next_mastermind(game)
                 game.phase = Phase.TEAM_SELECTION
-                _log_event(game, f"Team was rejected. New mastermind is {game.players[game.mastermindId].displayName}.")
+                _log_event(game, LogEvent.TEAM_REJECTED, [game.mastermindId], [approve_votes, reject_votes])
             game.proposedTeam = None
 
         game.votes = {}
         game.acknowledgements = []
         
-        db_client.set(game.gameId, game.model_dump_json())  # Save the updated state back to Valkey
+        # Save the updated state back to Valkey
+        with UnitOfWork(db_client) as uow:
+            uow.save(game)
+            if game.status == GameStatus.FINISHED:
+                _queue_game_finished(uow, game)
 
         await connection_manager.broadcast(game.gameId, game)
 
@@ -809,7 +1494,7 @@ async def acknowledge_vote_reveal(
     return game
 
 
-@router.post("/games/{game_id}/reset", response_model=GameState)
+@router.post("/games/{game_id}/reset", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def reset_game(
     player_id: str = Body(..., embed=True, description="The UID of the host player resetting the game."),
     game: GameState = Depends(get_game_state_from_db)
@@ -836,17 +1521,19 @@ async def reset_game(
     game.missionHistory = []
     game.winner = None
 
-    _log_event(game, f"Host {game.players[player_id].displayName} has reset the game for a new round.")
+    _log_event(game, LogEvent.GAME_RESET, [player_id])
     # Reset player-specific fields
     for p in game.players.values():
         p.role = None
         p.missionChoice = None
+        p.failCardsPlayed = 0
     
-    db_client.set(game.gameId, game.model_dump_json())  # Save the updated state back to Valkey 
+    # Saving the open lobby also lists a public game alongside the other public lobbies.
+    _save_game(db_client, game)
     await connection_manager.broadcast(game.gameId, game)
     return game
 
-@router.post("/games/{game_id}/acknowledge-reveal", response_model=GameState)
+@router.post("/games/{game_id}/acknowledge-reveal", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def acknowledge_reveal(
     player_id: str = Body(..., embed=True, description="The UID of the player acknowledging the results."),
     game: GameState = Depends(get_game_state_from_db)
@@ -883,15 +1570,16 @@ async def acknowledge_reveal(
             p.missionChoice = None
 
         last_mission = game.missionHistory[-1]
-        _log_event(game, f"Mission {last_mission.missionNumber} was a {last_mission.result.value} with {last_mission.failVotes} fail card(s). New mastermind is {game.players[game.mastermindId].displayName}.")
+        event = LogEvent.MISSION_SUCCEEDED if last_mission.result == MissionChoice.SUCCESS else LogEvent.MISSION_FAILED
+        _log_event(game, event, [game.mastermindId], [last_mission.missionNumber, last_mission.failVotes])
         
-        db_client.set(game.gameId, game.model_dump_json())  # Save the updated state back to Valkey
+        _save_game(db_client, game)  # Save the updated state back to Valkey
 
         await connection_manager.broadcast(game.gameId, game)
 
     return game
 
-@router.post("/games/{game_id}/play-mission-card", response_model=GameState)
+@router.post("/games/{game_id}/play-mission-card", response_model=GameState, dependencies=[Depends(rate_limited("action"))])
 async def play_mission_card(request: PlayMissionCardRequest, game: GameState = Depends(get_game_state_from_db)):
     """
     A member of the Heist Team plays their card for the mission.
@@ -924,21 +1612,18 @@ async def play_mission_card(request: PlayMissionCardRequest, game: GameState = D
     # --- Record the mission card choice ---
     player.missionChoice = request.choice
 
-    # --- Save the intermediate state to the database ---
-    db_client.set(game.gameId, game.model_dump_json())
-
     # --- Tally if all mission members have played their card ---
-    mission_team_choices = [game.players[pid].missionChoice for pid in game.proposedTeam]
-    if None not in mission_team_choices:
+    tally = _tally_mission(game)
+    if tally is None:
+        # --- Save the intermediate state to the database ---
+        _save_game(db_client, game)
+        await connection_manager.broadcast(game.gameId, game)
+    else:
         # --- All cards are in, determine mission outcome ---
-        fail_cards_played = mission_team_choices.count(MissionChoice.FAIL) # This is safe because only Agents can play FAIL
-        
-        # Determine if the mission failed based on the rules
-        is_special_mission_4 = game.missionNumber == 4 and len(game.players) >= 7
-        mission_failed = (is_special_mission_4 and fail_cards_played >= 2) or \
-                         (not is_special_mission_4 and fail_cards_played >= 1)
-        
-        mission_result = MissionChoice.FAIL if mission_failed else MissionChoice.SUCCESS
+        mission_result, fail_cards_played = tally
+        for pid in game.proposedTeam:
+            if game.players[pid].missionChoice == MissionChoice.FAIL:
+                game.players[pid].failCardsPlayed += 1
 
         # Update mission history
         game.missionHistory.append(Mission(
@@ -955,15 +1640,20 @@ async def play_mission_card(request: PlayMissionCardRequest, game: GameState = D
         if successes >= 3:
             game.status = GameStatus.FINISHED
             game.winner = Winner.THIEVES
-            _log_event(game, "Thieves have completed 3 missions successfully!")
+            _log_event(game, LogEvent.THIEVES_WIN)
         elif failures >= 3:
             game.status = GameStatus.FINISHED
             game.winner = Winner.AGENTS
-            _log_event(game, "Agents have sabotaged 3 missions!")
+            _log_event(game, LogEvent.AGENTS_WIN)
 
-        # Trigger the conclusion logic as a background task.
-        asyncio.create_task(handle_mission_conclusion(game.gameId, game))
-
-    await connection_manager.broadcast(game.gameId, game)
+        # Reveal the mission result in the same write; a timer moves on to the next mission.
+        await handle_mission_conclusion(game.gameId, game)
 
     return game
+
+
+PHASE_CONCLUSIONS = {
+    "agent_reveal": handle_agent_reveal_conclusion,
+    "vote_reveal": handle_vote_reveal_conclusion,
+    "mission_reveal": handle_mission_reveal_conclusion,
+}
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, computed_field
 from typing import List, Dict, Optional
-from enum import Enum
+from enum import Enum, IntEnum
 from datetime import datetime
 import uuid
 
@@ -34,10 +34,49 @@ class Winner(str, Enum):
     THIEVES = "THIEVES"
     AGENTS = "AGENTS"
 
-# Sub-model for a log entry
+# Stored in game logs and decoded by the client (services/gameLog.js), so codes
+# are never reused or renumbered; new events get the next free number.
+class LogEvent(IntEnum):
+    GAME_CREATED = 1
+    PLAYER_JOINED = 2
+    PLAYER_LEFT = 3
+    PLAYER_KICKED = 4
+    BOT_TOOK_SEAT = 5
+    SEAT_RECLAIMED = 6
+    HOST_LEFT = 7 # Game terminated
+    TOO_FEW_PLAYERS = 8 # Game terminated
+    GAME_STARTED = 9
+    AGENTS_REVEALED = 10
+    TEAM_PROPOSED = 11
+    TEAM_APPROVED = 12
+    TEAM_REJECTED = 13
+    FIFTH_REJECTION = 14 # Agents win
+    MISSION_ABORTED = 15
+    MASTERMIND_OFFLINE = 16
+    MISSION_SUCCEEDED = 17
+    MISSION_FAILED = 18
+    THIEVES_WIN = 19
+    AGENTS_WIN = 20
+    GAME_RESET = 21
+
+def _is_empty(value) -> bool:
+    return not value
+
+# Sub-model for a log entry. The client renders the text, so entries only carry
+# the event and its arguments, under one-letter keys with empty ones left out:
+#   t: milliseconds since the game's createdAt
+#   e: the LogEvent code
+#   p: players, as indexes into playerOrder; -1, -2, ... refer to x[0], x[1], ...
+#   n: numbers (vote counts, mission number and fail cards)
+#   x: display names of players who are no longer in playerOrder
 class LogEntry(BaseModel):
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-    message: str
+    model_config = ConfigDict(validate_by_name=True, serialize_by_alias=True)
+
+    offsetMs: int = Field(alias="t")
+    event: LogEvent = Field(alias="e")
+    seats: List[int] = Field(default_factory=list, alias="p", exclude_if=_is_empty)
+    numbers: List[int] = Field(default_factory=list, alias="n", exclude_if=_is_empty)
+    names: List[str] = Field(default_factory=list, alias="x", exclude_if=_is_empty)
 
 # NEW: Sub-model for a chat message
 class ChatMessage(BaseModel):
@@ -55,8 +94,11 @@ class Player(BaseModel):
     isOnline: bool = True
     role: Optional[Role] = None
     missionChoice: Optional[MissionChoice] = None
+    failCardsPlayed: int = Field(0, exclude_if=_is_empty) # For stats; hidden from other players like missionChoice
     character: Optional[str] = None # Optional character ID for customization
     chatColor: Optional[str] = None
+    isBot: bool = False # Seat played by the server (added bot or taken over after a disconnect)
+    addedAsBot: bool = False # Added by the host as a bot: never handed to a human, not counted in stats
 
 # Sub-model for a Mission in the history, as defined in Section 5.3
 class Mission(BaseModel):
@@ -94,6 +136,13 @@ class GameState(BaseModel):
     # FIX: Added the missing playerOrder field
     playerOrder: List[str] = Field(default_factory=list, alias='playerOrder')
 
+    tournamentId: Optional[str] = None # Set on tables created by a tournament
+
+    # Not stored: the version a lobby (or, when sharded, any game) was loaded at,
+    # which its next save must still match (see UnitOfWork). None for games whose
+    # saves are not checked.
+    _version: Optional[int] = PrivateAttr(default=None)
+
 
 # Request model for the proposeTeam endpoint
 class ProposeTeamRequest(BaseModel):
@@ -115,6 +164,10 @@ class SendChatRequest(BaseModel):
     player_id: str
     message: str
 
+# Request model for adding a bot to the lobby
+class AddBotRequest(BaseModel):
+    host_id: str
+
 # NEW: Request model for kicking a player
 class KickPlayerRequest(BaseModel):
     host_id: str
@@ -124,3 +177,102 @@ class KickPlayerRequest(BaseModel):
 class JoinGameResponse(BaseModel):
     new_player_id: str = Field(..., description="The UID of the player that just joined.")
     game_state: GameState = Field(..., description="The full state of the game after the join.")
+
+
+# Aggregated per-player statistics, built up as games finish
+class PlayerStats(BaseModel):
+    playerId: str
+    displayName: str = ""
+    gamesPlayed: int = 0
+    wins: int = 0
+    thiefGames: int = 0
+    thiefWins: int = 0
+    agentGames: int = 0
+    agentWins: int = 0
+    missionsPlayed: int = 0
+    missionsSabotaged: int = 0 # FAIL cards the player played
+
+    @computed_field
+    @property
+    def winRate(self) -> float:
+        return self.wins / self.gamesPlayed if self.gamesPlayed else 0.0
+
+    @computed_field
+    @property
+    def thiefWinRate(self) -> float:
+        return self.thiefWins / self.thiefGames if self.thiefGames else 0.0
+
+    @computed_field
+    @property
+    def agentWinRate(self) -> float:
+        return self.agentWins / self.agentGames if self.agentGames else 0.0
+
+# A single row of the leaderboard
+class LeaderboardEntry(BaseModel):
+    rank: int
+    stats: PlayerStats
+
+# Request model for provisioning a tournament
+class CreateTournamentRequest(BaseModel):
+    name: str = "Tournament"
+    # Up to 64 tables of 8: an event of a few dozen games, written in one unit of work.
+    roster: List[str] = Field(..., description="Display names of the entrants, seated at the tables in this order.",
+                              min_length=5, max_length=512)
+    tables: int = Field(..., ge=1, le=64, description="Number of games to split the roster across (5-8 players each).")
+
+# Request model for starting a tournament's next round
+class AdvanceTournamentRequest(BaseModel):
+    organizer_id: str
+    force: bool = Field(False, description="Advance even if some tables never finished; nobody from them advances.")
+
+# An entrant's seat in the current round
+class TournamentEntrant(BaseModel):
+    displayName: str
+    gameId: Optional[str] = None # None once eliminated
+    playerId: Optional[str] = None # Their player UID in that game
+
+class TournamentState(BaseModel):
+    tournamentId: str
+    name: str
+    organizerId: str
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    status: GameStatus = GameStatus.IN_PROGRESS
+    round: int = 1
+    entrants: Dict[str, TournamentEntrant] # Keyed by join token
+    tables: List[str] = [] # Game IDs of the current round
+    champions: List[str] = [] # Join tokens of the final table's winners
+
+# One table of the current round, as shown publicly
+class TournamentTable(BaseModel):
+    players: List[str] # Display names
+    finished: bool
+
+# The public view of a tournament, without join tokens or player IDs
+class TournamentSummary(BaseModel):
+    tournamentId: str
+    name: str
+    createdAt: datetime
+    status: GameStatus
+    round: int
+    entrants: int
+    tables: List[TournamentTable]
+    champions: List[str] # Display names
+
+# One row of the admin live-games view
+class LiveGameSummary(BaseModel):
+    gameId: str
+    status: GameStatus
+    phase: Optional[Phase] = None # Only set while in progress
+    isPublic: bool = False
+    players: int
+    online: int
+    bots: int
+    sockets: int = 0 # Open player WebSocket/SSE connections on this process
+    spectators: int = 0
+    lastActivity: float # Unix time of the last write
+    sizeBytes: int # Size of the stored state
+
+# Runtime settings of the sampling profiler (admin only)
+class ProfilingSettings(BaseModel):
+    sample_rate: float = Field(..., ge=0, le=1, description="Fraction of requests and broadcasts to profile; 0 disables.")
+    dump_every: int = Field(50, ge=1, description="Number of samples aggregated into each profile file.")
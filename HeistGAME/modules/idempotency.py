@@ -0,0 +1,113 @@
+import os
+import re
+import json
+import base64
+import hashlib
+
+from .database import get_valkey_client
+from . import keys
+
+# --- Idempotency Keys ---
+# Clients that retry a POST on timeout send the same Idempotency-Key header with
+# each attempt. The first attempt runs normally and its response is cached in
+# Valkey for IDEMPOTENCY_TTL seconds; retries are answered from the cache without
+# touching the game, so nothing is mutated or broadcast twice.
+#
+# While the first attempt is still running, a retry gets 409. Reusing a key with a
+# different request body gets 422. Rate-limited (429) and server error (5xx)
+# responses are not cached, so the retry runs for real.
+
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 300))
+
+IDEMPOTENT_ROUTES = re.compile(r"^/api/v1/games/([^/]+)/(submit-vote|play-mission-card|propose-team|chat)$")
+
+_PENDING = "pending"
+
+
+def _plain_response(status: int, detail: str) -> tuple:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+    return status, headers, body
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware caching the responses of retry-prone game actions by Idempotency-Key.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        match = IDEMPOTENT_ROUTES.match(scope["path"])
+        key = dict(scope["headers"]).get(b"idempotency-key") if match else None
+        if not key:
+            await self.app(scope, receive, send)
+            return
+
+        # The body is part of the fingerprint, so read it up front and replay it below.
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(scope["path"].encode("utf-8") + b"\n" + body).hexdigest()
+        cache_key = keys.idempotency(match.group(1), key.decode("latin-1"))
+
+        db_client = get_valkey_client()
+        if not db_client.set(cache_key, json.dumps({"state": _PENDING, "fingerprint": fingerprint}),
+                             nx=True, ex=IDEMPOTENCY_TTL):
+            await self._answer_from_cache(db_client.get(cache_key), fingerprint, send)
+            return
+
+        response = {"status": 500, "headers": [], "body": []}
+
+        async def replay_receive():
+            nonlocal body
+            if body is None:
+                return await receive()
+            message, body = {"type": "http.request", "body": body, "more_body": False}, None
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        finally:
+            status = response["status"]
+            if status == 429 or status >= 500:
+                # Let the client's retry run for real.
+                db_client.delete(cache_key)
+            else:
+                db_client.set(cache_key, json.dumps({
+                    "state": "done",
+                    "fingerprint": fingerprint,
+                    "status": status,
+                    "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in response["headers"]],
+                    "body": base64.b64encode(b"".join(response["body"])).decode("ascii"),
+                }), ex=IDEMPOTENCY_TTL)
+
+    async def _answer_from_cache(self, cached, fingerprint: str, send):
+        entry = json.loads(cached) if cached else None
+        if entry is not None and entry["fingerprint"] != fingerprint:
+            status, headers, body = _plain_response(422, "Idempotency-Key was already used for a different request.")
+        elif entry is None or entry["state"] == _PENDING:
+            # (None: the entry expired between the two commands; a retry will run normally.)
+            status, headers, body = _plain_response(409, "A request with this Idempotency-Key is still in progress.")
+        else:
+            status = entry["status"]
+            headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in entry["headers"]]
+            headers.append((b"idempotent-replayed", b"true"))
+            body = base64.b64decode(entry["body"])
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,66 @@
+import os
+import zlib
+
+from .sharding import SHARDING_ENABLED, NODE_ID
+
+# --- Valkey Key Schema ---
+# Every key that belongs to one game carries the game ID as its hash tag
+# (game:{<id>}:...). In a Valkey Cluster they all map to the same slot, so a
+# game's MULTI/EXEC, WATCH and scripts stay valid. Keys shared by all games are
+# kept out of those transactions: see UnitOfWork.
+#
+# The public lobby list and matchmaking's fill index would otherwise be hit by
+# every lobby write, so they are split into LOBBY_INDEX_SHARDS keys, each with
+# its own hash tag, and spread over the cluster's nodes.
+
+LOBBY_INDEX_SHARDS = int(os.environ.get("LOBBY_INDEX_SHARDS", 16))
+
+# --- Per game ---
+
+def game_state(game_id: str) -> str:
+    return f"game:{{{game_id}}}:state"
+
+def game_version(game_id: str) -> str:
+    return f"game:{{{game_id}}}:version"
+
+def idempotency(game_id: str, key: str) -> str:
+    return f"game:{{{game_id}}}:idempotency:{key}"
+
+def rate_limit(route: str, game_id: str, player_id: str) -> str:
+    return f"game:{{{game_id}}}:ratelimit:{route}:{player_id}"
+
+# --- Lobby indexes ---
+
+def lobby_shard(game_id: str) -> int:
+    return zlib.crc32(game_id.encode("utf-8")) % LOBBY_INDEX_SHARDS
+
+def public_lobbies(shard: int) -> str:
+    return f"lobbies:{{{shard}}}:public"
+
+def lobby_fill(shard: int) -> str:
+    """
+    Sorted set of public lobbies scored by their player count, used by matchmaking.
+    When sharded by game affinity, each node only fills the lobbies it owns.
+    """
+    return f"lobbies:{{{shard}}}:fill:{NODE_ID}" if SHARDING_ENABLED else f"lobbies:{{{shard}}}:fill"
+
+# Bumped whenever a public lobby changes; the ETag of GET /games.
+LOBBY_LIST_VERSION = "lobbies:version"
+
+# --- Tournaments ---
+
+def tournament(tournament_id: str) -> str:
+    return f"tournament:{{{tournament_id}}}"
+
+def tournament_results(tournament_id: str) -> str:
+    return f"tournament:{{{tournament_id}}}:results"
+
+# --- Players and timers ---
+
+def player_stats(player_id: str) -> str:
+    return f"stats:player:{player_id}"
+
+LEADERBOARD = "leaderboard:wins"
+
+# Phase timers handed off by a draining server, scored by deadline.
+PHASE_TIMERS = "phase_timers"
@@ -0,0 +1,95 @@
+import os
+import signal
+import asyncio
+import threading
+import logging
+from typing import Optional
+
+from .database import get_valkey_client
+from .game import connection_manager, persist_phase_timers, resume_phase_timers
+from .sharding import shard_coordinator, SHARDING_ENABLED, HEARTBEAT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# --- Graceful Shutdown ---
+# On SIGTERM (e.g. a redeploy) the server drains before uvicorn starts closing
+# connections: it stops accepting sockets, hands its pending phase timers off to
+# Valkey, sends every client a {"type": "reconnect"} frame and closes its socket.
+# Disconnects during the drain are not treated as players leaving, so no game is
+# terminated because its host "left". Other instances claim the handed-off timers
+# on their next sweep and finish the phases at the original deadlines. Pending bot
+# moves are picked up by whichever instance the players reconnect to.
+#
+# When sharded, the node first leaves the ring and waits one heartbeat, so that its
+# peers route the reconnecting clients to the games' new owners instead of back here.
+
+TIMER_SWEEP_SECONDS = float(os.environ.get("TIMER_SWEEP_SECONDS", 2))
+
+
+class Lifecycle:
+    def __init__(self):
+        self._sweeper: Optional[asyncio.Task] = None
+        self._drain_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """
+        Chains the SIGTERM handler and starts picking up timers handed off by other instances.
+        """
+        self._sweeper = asyncio.create_task(self._sweep())
+        if threading.current_thread() is not threading.main_thread():
+            # Signal handlers can only be set from the main thread (TestClient, or a
+            # server run in a thread); the host process handles shutdown there.
+            logger.warning("Not on the main thread; SIGTERM will not drain connections")
+            return
+
+        loop = asyncio.get_running_loop()
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def on_sigterm(signum, frame):
+            # Runs between bytecodes on the main thread: flag the drain straight away,
+            # then do the async part on the loop before passing the signal on.
+            connection_manager.draining = True
+            loop.call_soon_threadsafe(self._begin_drain, previous, signum, frame)
+
+        signal.signal(signal.SIGTERM, on_sigterm)
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        # Also covers shutdowns that did not come through SIGTERM.
+        persist_phase_timers(get_valkey_client())
+
+    def _begin_drain(self, previous, signum, frame):
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain_then_exit(previous, signum, frame))
+
+    async def _drain_then_exit(self, previous, signum, frame):
+        try:
+            handed_off = persist_phase_timers(get_valkey_client())
+            if SHARDING_ENABLED:
+                await shard_coordinator.stop()
+                await asyncio.sleep(HEARTBEAT_SECONDS)
+            closed = await connection_manager.drain()
+            logger.info(f"Drained {closed} connection(s) and handed off {handed_off} phase timer(s)")
+        except Exception:
+            logger.exception("Draining failed")
+        finally:
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                # No handler to chain to: fall back to the default action.
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                os.kill(os.getpid(), signal.SIGTERM)
+
+    async def _sweep(self):
+        while not connection_manager.draining:
+            try:
+                resumed = resume_phase_timers(get_valkey_client())
+                if resumed:
+                    logger.info(f"Resumed {resumed} phase timer(s) handed off by another instance")
+            except Exception:
+                logger.exception("Resuming phase timers failed")
+            await asyncio.sleep(TIMER_SWEEP_SECONDS)
+
+lifecycle = Lifecycle()
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List
+
+from .database import get_valkey_client
+from . import keys
+from .game import (
+    connection_manager, _build_new_game, _join_lobby, _load_game, _save_game, _log_event, MAX_PLAYERS,
+)
+from .sharding import shard_coordinator
+from .game_models import JoinGameResponse, LogEvent
+
+# --- Quick-Join Matchmaking ---
+# Public lobbies are tracked in sorted sets scored by player count, one per lobby
+# index shard. Claiming a seat runs as a single Lua script on one shard, so
+# concurrent requests never pick the same last seat. The join itself is a checked
+# lobby save (see UnitOfWork), so neither it nor any other lobby write can
+# overwrite the other.
+
+MAX_PLACEMENT_ATTEMPTS = 5
+
+# Picks the fullest lobby that still has room and reserves a seat in it.
+CLAIM_SEAT_SCRIPT = """
+local ids = redis.call('ZREVRANGEBYSCORE', KEYS[1], ARGV[1], '-inf', 'LIMIT', 0, 1)
+if #ids == 0 then
+    return false
+end
+redis.call('ZINCRBY', KEYS[1], 1, ids[1])
+return ids[1]
+"""
+
+router = APIRouter()
+
+def _join_claimed_lobby(db_client, game_id: str, display_name: str):
+    """
+    Adds a player to a lobby whose seat has been claimed. Returns (game,
+    new_player_id), or None if the lobby turned out to be gone, started, full or,
+    after the shard ring changed, owned by another node.
+    """
+    if not shard_coordinator.is_local(game_id):
+        return None
+    game = _load_game(db_client, game_id)
+    if not game:
+        return None
+    try:
+        return _join_lobby(db_client, game, display_name)
+    except HTTPException:
+        return None
+
+def _shards_with_room(db_client) -> List[int]:
+    """
+    Returns the lobby index shards holding a lobby with room, the fullest lobby first.
+    """
+    pipe = db_client.pipeline(transaction=False)
+    for shard in range(keys.LOBBY_INDEX_SHARDS):
+        pipe.zrevrangebyscore(keys.lobby_fill(shard), MAX_PLAYERS - 1, "-inf", start=0, num=1, withscores=True)
+    tops = [(top[0][1], shard) for shard, top in enumerate(pipe.execute()) if top]
+    return [shard for _, shard in sorted(tops, reverse=True)]
+
+@router.post("/matchmaking/quick-join", response_model=JoinGameResponse)
+async def quick_join(
+    display_name: str = Query(..., description="The display name of the player looking for a game.")
+):
+    """
+    Places the player into the fullest public lobby that still has room,
+    or creates a new public game if none is available.
+    """
+    db_client = get_valkey_client()
+    claim_seat = db_client.register_script(CLAIM_SEAT_SCRIPT)
+
+    attempts = 0
+    for shard in _shards_with_room(db_client):
+        fill_key = keys.lobby_fill(shard)
+        while attempts < MAX_PLACEMENT_ATTEMPTS:
+            attempts += 1
+            game_id = claim_seat(keys=[fill_key], args=[MAX_PLAYERS - 1])
+            if not game_id:
+                break
+
+            placed = _join_claimed_lobby(db_client, game_id, display_name)
+            if placed is None:
+                # Stale index entry: drop it and try the next lobby.
+                db_client.zrem(fill_key, game_id)
+                continue
+
+            game, new_player_id = placed
+            await connection_manager.broadcast(game.gameId, game)
+            return JoinGameResponse(new_player_id=new_player_id, game_state=game)
+
+    # No lobby with room: open a new public game with this player as host.
+    new_game = _build_new_game(display_name, is_public=True)
+    _log_event(new_game, LogEvent.GAME_CREATED, [new_game.hostId])
+    _save_game(db_client, new_game)
+    return JoinGameResponse(new_player_id=new_game.hostId, game_state=new_game)
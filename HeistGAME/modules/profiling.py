@@ -0,0 +1,116 @@
+import os
+import time
+import random
+import cProfile
+import pstats
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# --- Opt-In Sampling Profiler ---
+# A configurable fraction of HTTP requests and broadcasts run under cProfile. Stats
+# are aggregated per kind and written as .prof files (snakeviz, flameprof and
+# gprof2dot all read them) every PROFILE_DUMP_EVERY samples. When the sample rate
+# is 0, the only cost on the hot path is one comparison.
+#
+# cProfile follows the thread, not the coroutine: a sampled request also records
+# whatever else the event loop ran while it was awaiting. Only one sample is
+# taken at a time so that profiles never overlap.
+
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_DUMP_EVERY = int(os.environ.get("PROFILE_DUMP_EVERY", 50))
+
+_NOT_SAMPLED = nullcontext()
+
+
+class _ProfileSession:
+    __slots__ = ("owner", "kind", "profiler")
+
+    def __init__(self, owner: "SamplingProfiler", kind: str):
+        self.owner = owner
+        self.kind = kind
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self.owner._active = True
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        self.owner._active = False
+        self.owner._collect(self.kind, self.profiler)
+
+
+class SamplingProfiler:
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE, output_dir: str = PROFILE_DIR,
+                 dump_every: int = PROFILE_DUMP_EVERY):
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.dump_every = dump_every
+        self._active = False
+        # {kind: (aggregated stats, number of samples)}
+        self._stats: Dict[str, tuple] = {}
+
+    def profile(self, kind: str):
+        """
+        Returns a context manager that profiles its body for a sampled fraction of calls.
+        """
+        if self.sample_rate <= 0 or self._active or random.random() >= self.sample_rate:
+            return _NOT_SAMPLED
+        return _ProfileSession(self, kind)
+
+    def _collect(self, kind: str, profiler: cProfile.Profile):
+        stats, samples = self._stats.get(kind, (None, 0))
+        if stats is None:
+            stats = pstats.Stats(profiler)
+        else:
+            stats.add(profiler)
+        samples += 1
+        if samples >= self.dump_every:
+            self._stats.pop(kind, None)
+            # The aggregated stats now belong to the writer thread alone.
+            threading.Thread(target=self._dump, args=(kind, stats, samples), daemon=True).start()
+        else:
+            self._stats[kind] = (stats, samples)
+
+    def _dump(self, kind: str, stats: pstats.Stats, samples: int) -> Optional[str]:
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{samples}.prof")
+            stats.dump_stats(path)
+            logger.info(f"Wrote profile of {samples} {kind} samples to {path}")
+            return path
+        except Exception:
+            logger.exception(f"Failed to write {kind} profile")
+            return None
+
+    def dump_all(self) -> list:
+        """
+        Writes out every partially filled aggregate immediately.
+        """
+        pending, self._stats = self._stats, {}
+        return [path for kind, (stats, samples) in pending.items() if (path := self._dump(kind, stats, samples))]
+
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs a sampled fraction of HTTP requests under the profiler.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Event streams last as long as the connection, like WebSockets: profiling
+        # one would hold the single sample slot open until the client leaves.
+        if scope["type"] != "http" or scope["path"].startswith("/sse/"):
+            await self.app(scope, receive, send)
+            return
+        with profiler.profile("request"):
+            await self.app(scope, receive, send)
@@ -0,0 +1,139 @@
+import os
+import math
+import time
+import logging
+from fastapi import HTTPException, Request
+from typing import Dict, Tuple
+
+from .database import get_valkey_client
+from . import keys
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# --- Per-Player Rate Limiting ---
+# Every chat message or game action costs a full state read, write and a broadcast
+# to every socket in the game, so each player gets a token bucket per route class.
+# Buckets are keyed by route class, game and player. The check runs as a route
+# dependency, before the game state is loaded, so rejected requests never touch
+# the game. Bots call the handlers directly and are never limited.
+#
+# Limits are "<requests>/<seconds>": a burst of <requests>, refilling evenly over
+# <seconds>. With several workers, RATE_LIMIT_BACKEND=valkey shares the buckets
+# through Valkey; the default keeps them in process.
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+
+def _parse_limit(env_name: str, default: str) -> Tuple[float, float]:
+    """
+    Returns (capacity, refill rate per second) for a "<requests>/<seconds>" setting.
+    """
+    requests, seconds = os.environ.get(env_name, default).split("/")
+    return float(requests), float(requests) / float(seconds)
+
+RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "chat": _parse_limit("RATE_LIMIT_CHAT", "5/10"),
+    "action": _parse_limit("RATE_LIMIT_ACTION", "20/10"),
+}
+
+RATE_LIMITED = Counter("heist_rate_limited_total", "Requests rejected by the per-player rate limiter.", ("route",))
+
+# Atomically refills and takes one token. Returns {allowed, milliseconds until a token is free}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate))
+return {allowed, wait}
+"""
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets. Idle buckets are pruned once they would be full again.
+    """
+    PRUNE_EVERY = 10000
+
+    def __init__(self):
+        # {key: (tokens, last refill time)}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._calls = 0
+
+    def acquire(self, key: str, capacity: float, rate: float) -> float:
+        """
+        Takes a token. Returns 0 if allowed, else the seconds until one is available.
+        """
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * rate)
+        self._calls += 1
+        if self._calls >= self.PRUNE_EVERY:
+            self._prune(now)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+    def _prune(self, now: float):
+        self._calls = 0
+        longest_refill = max(capacity / rate for capacity, rate in RATE_LIMITS.values())
+        self._buckets = {key: b for key, b in self._buckets.items() if now - b[1] < longest_refill}
+
+
+class ValkeyTokenBucketLimiter:
+    """
+    Token buckets shared by every worker, kept in Valkey hashes that expire when idle.
+    """
+    def acquire(self, key: str, capacity: float, rate: float) -> float:
+        db_client = get_valkey_client()
+        allowed, wait_ms = db_client.eval(
+            TOKEN_BUCKET_SCRIPT, 1, key, capacity, rate, int(time.time() * 1000)
+        )
+        return 0.0 if allowed else wait_ms / 1000
+
+limiter = ValkeyTokenBucketLimiter() if RATE_LIMIT_BACKEND == "valkey" else TokenBucketLimiter()
+
+
+def rate_limited(route: str):
+    """
+    Returns a route dependency enforcing the `route` limit for the calling player.
+    """
+    capacity, rate = RATE_LIMITS[route]
+
+    async def check(game_id: str, request: Request):
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        player_id = None
+        if isinstance(body, dict):
+            player_id = body.get("player_id") or body.get("host_id")
+        if not isinstance(player_id, str):
+            player_id = request.client.host if request.client else "unknown"
+
+        retry_after = limiter.acquire(keys.rate_limit(route, game_id, player_id), capacity, rate)
+        if retry_after > 0:
+            RATE_LIMITED.labels(route).inc()
+            logger.debug(f"Rate limited {route} request",
+                         extra={"game_id": game_id, "player_id": player_id})
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Slow down.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return check
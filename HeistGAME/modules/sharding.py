@@ -0,0 +1,214 @@
+import os
+import re
+import json
+import time
+import uuid
+import socket
+import asyncio
+import hashlib
+import logging
+from bisect import bisect
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .database import get_valkey_client
+
+logger = logging.getLogger(__name__)
+
+# --- Game-Affinity Sharding (optional) ---
+# Set NODE_URL (the address clients can reach this node on) on every node to turn
+# it on. Nodes heartbeat into a Valkey hash, and each builds the same consistent-
+# hash ring from the live entries. A game is owned by the node its ID hashes to:
+# create_game only hands out IDs this node owns, HTTP requests for other nodes'
+# games are redirected (307) and WebSocket connects are closed with code 4307 and
+# the owner's URL as the reason, which the frontend follows.
+#
+# Because every write to a game goes through its owner, the owner keeps recently
+# used games in memory and serves reads without a Valkey round trip. When the ring
+# changes, the node drops the games it no longer owns from memory and its listeners
+# send their clients to the new owner. Nodes see a change up to one heartbeat
+# apart, so every save is also checked against the game's stored version (see
+# UnitOfWork): a node still acting on a stale ring cannot overwrite the new owner.
+
+NODE_URL = os.environ.get("NODE_URL")
+NODE_ID = os.environ.get("NODE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+SHARDING_ENABLED = bool(NODE_URL)
+
+RING_KEY = "cluster:nodes"
+HEARTBEAT_SECONDS = float(os.environ.get("SHARD_HEARTBEAT_SECONDS", 5))
+NODE_TIMEOUT_SECONDS = HEARTBEAT_SECONDS * 3
+VIRTUAL_NODES = 64
+HOT_GAMES_MAX = int(os.environ.get("HOT_GAMES_MAX", 2000))
+
+# Close code telling a WebSocket client to reconnect to the node named in the reason.
+WS_REDIRECT_CODE = 4307
+
+ROUTED_HTTP_PATHS = re.compile(r"^/(?:api/v1/games|sse)/([^/]+)")
+ROUTED_WS_PATHS = re.compile(r"^/ws/([^/]+)/")
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent-hash ring with virtual nodes: adding a node moves only ~1/N of the games.
+    """
+    def __init__(self, nodes: Dict[str, str]):
+        self.nodes = nodes  # {node_id: url}
+        points = sorted((_hash(f"{node_id}#{i}"), node_id) for node_id in nodes for i in range(VIRTUAL_NODES))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node_id for _, node_id in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._owners:
+            return None
+        return self._owners[bisect(self._hashes, _hash(key)) % len(self._owners)]
+
+
+class ShardCoordinator:
+    def __init__(self):
+        self.ring = HashRing({NODE_ID: NODE_URL} if SHARDING_ENABLED else {})
+        # {game_id: (stored JSON, version)}, least recently used first
+        self._hot_games: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        # Coroutines awaited after every ring change, once the new ring is in place.
+        self.listeners: List[Callable[[], Awaitable[None]]] = []
+
+    def add_listener(self, listener: Callable[[], Awaitable[None]]):
+        self.listeners.append(listener)
+
+    # --- Ring membership ---
+
+    async def start(self):
+        if not SHARDING_ENABLED:
+            return
+        self._heartbeat()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Joined shard ring as {NODE_ID} ({len(self.ring.nodes)} node(s))")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        get_valkey_client().hdel(RING_KEY, NODE_ID)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                if self._heartbeat():
+                    for listener in self.listeners:
+                        await listener()
+            except Exception:
+                logger.exception("Shard heartbeat failed")
+
+    def _heartbeat(self) -> bool:
+        """
+        Refreshes this node's entry and rebuilds the ring; returns whether it changed.
+        """
+        db_client = get_valkey_client()
+        now = time.time()
+        db_client.hset(RING_KEY, NODE_ID, json.dumps({"url": NODE_URL, "seen": now}))
+        live, dead = {}, []
+        for node_id, entry in db_client.hgetall(RING_KEY).items():
+            entry = json.loads(entry)
+            if now - entry["seen"] <= NODE_TIMEOUT_SECONDS:
+                live[node_id] = entry["url"]
+            else:
+                dead.append(node_id)
+        if dead:
+            db_client.hdel(RING_KEY, *dead)
+        if live == self.ring.nodes:
+            return False
+        self.ring = HashRing(live)
+        for game_id in [game_id for game_id in self._hot_games if not self.is_local(game_id)]:
+            del self._hot_games[game_id]
+        logger.info(f"Shard ring changed: {sorted(live)}")
+        return True
+
+    # --- Ownership ---
+
+    def is_local(self, game_id: str) -> bool:
+        return not SHARDING_ENABLED or self.ring.owner(game_id) in (NODE_ID, None)
+
+    def owner_url(self, game_id: str) -> Optional[str]:
+        """
+        The base URL of the node owning the game, or None if it is this node.
+        """
+        if self.is_local(game_id):
+            return None
+        return self.ring.nodes[self.ring.owner(game_id)]
+
+    def new_game_id(self) -> str:
+        """
+        Draws game IDs until one lands on this node; takes about N tries with N nodes.
+        """
+        while True:
+            game_id = str(uuid.uuid4())[:8]
+            if self.is_local(game_id):
+                return game_id
+
+    # --- Hot game cache ---
+
+    def hot_game(self, game_id: str) -> Optional[Tuple[str, int]]:
+        """
+        Returns the game's (JSON, version) if this node owns it and holds it in memory.
+        """
+        if not self.is_local(game_id):
+            return None
+        entry = self._hot_games.get(game_id)
+        if entry is not None:
+            self._hot_games.move_to_end(game_id)
+        return entry
+
+    def remember(self, game_id: str, game_json: str, version: int):
+        if not SHARDING_ENABLED or not self.is_local(game_id):
+            return
+        self._hot_games[game_id] = (game_json, version)
+        self._hot_games.move_to_end(game_id)
+        if len(self._hot_games) > HOT_GAMES_MAX:
+            self._hot_games.popitem(last=False)
+
+    def forget(self, game_id: str):
+        self._hot_games.pop(game_id, None)
+
+shard_coordinator = ShardCoordinator()
+
+
+class ShardRoutingMiddleware:
+    """
+    ASGI middleware sending requests and sockets for other nodes' games to their owner.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not SHARDING_ENABLED or scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        pattern = ROUTED_HTTP_PATHS if scope["type"] == "http" else ROUTED_WS_PATHS
+        match = pattern.match(scope["path"])
+        owner_url = shard_coordinator.owner_url(match.group(1)) if match else None
+        if owner_url is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["type"] == "websocket":
+            # Accept first so the client actually receives the close code and reason.
+            await receive()
+            await send({"type": "websocket.accept"})
+            await send({"type": "websocket.close", "code": WS_REDIRECT_CODE, "reason": owner_url})
+            return
+
+        location = owner_url.rstrip("/") + scope["path"]
+        if scope.get("query_string"):
+            location += "?" + scope["query_string"].decode("latin-1")
+        await send({"type": "http.response.start", "status": 307, "headers": [
+            (b"location", location.encode("latin-1")),
+            (b"x-game-owner", owner_url.encode("latin-1")),
+            (b"content-length", b"0"),
+        ]})
+        await send({"type": "http.response.body", "body": b""})
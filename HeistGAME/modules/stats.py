@@ -0,0 +1,96 @@
+import os
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, List
+
+from .database import get_valkey_client
+from . import keys
+from .game_models import GameState, Role, Winner, PlayerStats, LeaderboardEntry
+
+# --- Player Statistics ---
+# Stats are folded in once per finished game: one hash per player for the counters
+# and a sorted set for the leaderboard, so reads never touch archived games.
+#
+# Players are identified by their player UID, which lasts as long as their seat at
+# a table (resets keep it) but not across tables, so every new table adds entries.
+# To keep that bounded, a player's counters expire STATS_TTL seconds after their
+# last counted game, and the leaderboard keeps the LEADERBOARD_SIZE players with
+# the most wins.
+
+STATS_TTL = int(os.environ.get("STATS_TTL", 30 * 24 * 3600))
+LEADERBOARD_SIZE = int(os.environ.get("LEADERBOARD_SIZE", 10000))
+
+def queue_game_stats(pipe, game: GameState):
+    """
+    Queues the increments of every player's counters for a finished game onto a
+    pipeline, so they are written with the game's final state.
+    Games that ended without a winner (e.g. terminated early) are not counted.
+    """
+    if game.winner is None:
+        return
+
+    for player_id, player in game.players.items():
+        # Host-added bots have no player behind them to keep stats for.
+        if player.role is None or player.addedAsBot:
+            continue
+        key = keys.player_stats(player_id)
+        is_agent = player.role == Role.AGENT
+        won = (game.winner == Winner.AGENTS) == is_agent
+        role_prefix = "agent" if is_agent else "thief"
+
+        missions_played = sum(1 for m in game.missionHistory if player_id in m.team)
+
+        pipe.hset(key, "displayName", player.displayName)
+        pipe.hincrby(key, "gamesPlayed", 1)
+        pipe.hincrby(key, f"{role_prefix}Games", 1)
+        pipe.hincrby(key, "missionsPlayed", missions_played)
+        if player.failCardsPlayed:
+            pipe.hincrby(key, "missionsSabotaged", player.failCardsPlayed)
+        if won:
+            pipe.hincrby(key, "wins", 1)
+            pipe.hincrby(key, f"{role_prefix}Wins", 1)
+        # Keep every counted player on the leaderboard, even with zero wins.
+        pipe.zincrby(keys.LEADERBOARD, 1 if won else 0, player_id)
+        pipe.expire(key, STATS_TTL)
+    # Drop the players with the fewest wins beyond the leaderboard's size.
+    pipe.zremrangebyrank(keys.LEADERBOARD, 0, -LEADERBOARD_SIZE - 1)
+
+def _to_player_stats(player_id: str, data: Dict[str, str]) -> PlayerStats:
+    return PlayerStats(playerId=player_id, **{k: v for k, v in data.items() if k in PlayerStats.model_fields})
+
+router = APIRouter()
+
+@router.get("/stats/players/{player_id}", response_model=PlayerStats)
+async def get_player_stats(player_id: str):
+    """
+    Retrieves the aggregated statistics for a single player.
+    """
+    db_client = get_valkey_client()
+    data = db_client.hgetall(keys.player_stats(player_id))
+    if not data:
+        raise HTTPException(status_code=404, detail=f"No statistics found for player '{player_id}'.")
+    return _to_player_stats(player_id, data)
+
+@router.get("/leaderboard", response_model=List[LeaderboardEntry])
+async def get_leaderboard(limit: int = Query(10, ge=1, le=100, description="The number of top players to return.")):
+    """
+    Retrieves the top players by total wins.
+    """
+    db_client = get_valkey_client()
+    top_players = db_client.zrevrange(keys.LEADERBOARD, 0, limit - 1)
+    if not top_players:
+        return []
+
+    pipe = db_client.pipeline(transaction=False)
+    for player_id in top_players:
+        pipe.hgetall(keys.player_stats(player_id))
+    results = pipe.execute()
+
+    # Players whose counters expired are dropped from the leaderboard as they are found.
+    expired = [player_id for player_id, data in zip(top_players, results) if not data]
+    if expired:
+        db_client.zrem(keys.LEADERBOARD, *expired)
+    live = [(player_id, data) for player_id, data in zip(top_players, results) if data]
+    return [
+        LeaderboardEntry(rank=rank, stats=_to_player_stats(player_id, data))
+        for rank, (player_id, data) in enumerate(live, start=1)
+    ]
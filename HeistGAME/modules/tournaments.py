@@ -0,0 +1,196 @@
+import json
+import uuid
+import random
+import logging
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Dict, List, Tuple
+
+from .database import get_valkey_client
+from . import keys
+from .admin import require_admin
+from .game import (
+    UnitOfWork, _build_new_game, _add_player, _log_event, FINISHED_GAME_TTL, MAX_PLAYERS,
+)
+from .game_models import (
+    GameState, GameStatus, LogEvent, CreateTournamentRequest, AdvanceTournamentRequest,
+    TournamentEntrant, TournamentState, TournamentTable, TournamentSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+# --- Tournaments ---
+# Provisions every table of an event in one go: the games are built in memory and
+# written together with the tournament in a single unit of work, instead of one
+# create and several join requests per table. Each entrant gets a join token;
+# GET /tournaments/{id}/entrants/{token} tells their client which game and seat
+# to connect to in the current round. Tokens are only ever returned to the
+# organizer, who creates events with the admin token; the public view of a
+# tournament lists display names only.
+#
+# Tables report their winners into a results hash as they finish (see
+# _queue_game_finished). Advancing seats the winners at new tables, until the
+# winners of a round with a single table are the champions.
+
+MIN_TABLE_SIZE = 5
+
+def _table_sizes(player_count: int, tables: int) -> List[int]:
+    """
+    Splits players across tables as evenly as possible.
+    """
+    base, extra = divmod(player_count, tables)
+    return [base + 1 if i < extra else base for i in range(tables)]
+
+def _seat_tables(tournament: TournamentState, tokens: List[str], tables: int) -> List[GameState]:
+    """
+    Builds one private game per table with the given entrants, in order, and
+    points each entrant at their new seat. The first entrant at a table hosts it.
+    """
+    games = []
+    position = 0
+    for size in _table_sizes(len(tokens), tables):
+        table_tokens = tokens[position:position + size]
+        position += size
+        host = tournament.entrants[table_tokens[0]]
+        game = _build_new_game(host.displayName, is_public=False)
+        game.tournamentId = tournament.tournamentId
+        _log_event(game, LogEvent.GAME_CREATED, [game.hostId])
+        host.gameId, host.playerId = game.gameId, game.hostId
+        for token in table_tokens[1:]:
+            entrant = tournament.entrants[token]
+            entrant.gameId, entrant.playerId = game.gameId, _add_player(game, entrant.displayName)
+        games.append(game)
+    tournament.tables = [game.gameId for game in games]
+    return games
+
+def _save_tournament(db_client, tournament: TournamentState, games: List[GameState] = ()):
+    """
+    Writes the tournament and any new tables in one unit of work.
+    """
+    ttl = FINISHED_GAME_TTL if tournament.status == GameStatus.FINISHED else None
+    with UnitOfWork(db_client) as uow:
+        for game in games:
+            uow.save(game)
+        uow.pipe.set(keys.tournament(tournament.tournamentId), tournament.model_dump_json(), ex=ttl)
+        if ttl:
+            uow.pipe.expire(keys.tournament_results(tournament.tournamentId), ttl)
+
+def _load_tournament(db_client, tournament_id: str) -> TournamentState:
+    tournament_json = db_client.get(keys.tournament(tournament_id))
+    if not tournament_json:
+        raise HTTPException(status_code=404, detail=f"Tournament with ID '{tournament_id}' not found.")
+    return TournamentState.model_validate_json(tournament_json)
+
+def _next_round(winners: List[str]) -> Tuple[List[str], int]:
+    """
+    Picks the entrants and table count of the next round. Winners that do not fit
+    at MAX_PLAYERS per table are drawn out at random.
+    """
+    tables = max(1, len(winners) // MIN_TABLE_SIZE)
+    seated = list(winners)
+    random.shuffle(seated)
+    return seated[:tables * MAX_PLAYERS], tables
+
+router = APIRouter()
+
+@router.post("/tournaments", response_model=TournamentState, status_code=201,
+             dependencies=[Depends(require_admin)])
+async def create_tournament(request: CreateTournamentRequest):
+    """
+    Creates every table of a tournament at once. The response holds the entrants'
+    join tokens and the organizer ID needed to advance rounds, so keep it private.
+    """
+    sizes = _table_sizes(len(request.roster), request.tables)
+    if min(sizes) < MIN_TABLE_SIZE or max(sizes) > MAX_PLAYERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{len(request.roster)} players cannot be split into {request.tables} tables of {MIN_TABLE_SIZE}-{MAX_PLAYERS}."
+        )
+
+    tournament = TournamentState(
+        tournamentId=str(uuid.uuid4())[:8],
+        name=request.name,
+        organizerId=str(uuid.uuid4()),
+        entrants={str(uuid.uuid4()): TournamentEntrant(displayName=name) for name in request.roster},
+    )
+    games = _seat_tables(tournament, list(tournament.entrants), request.tables)
+    _save_tournament(get_valkey_client(), tournament, games)
+    logger.info(f"Tournament {tournament.tournamentId} created with {len(games)} table(s)")
+    return tournament
+
+@router.get("/tournaments/{tournament_id}", response_model=TournamentSummary)
+async def get_tournament(tournament_id: str):
+    """
+    Returns the public standings: who sits at which table this round, which tables
+    have finished, and the champions once decided.
+    """
+    db_client = get_valkey_client()
+    tournament = _load_tournament(db_client, tournament_id)
+    finished = db_client.hgetall(keys.tournament_results(tournament_id))
+    players: Dict[str, List[str]] = {game_id: [] for game_id in tournament.tables}
+    for entrant in tournament.entrants.values():
+        if entrant.gameId in players:
+            players[entrant.gameId].append(entrant.displayName)
+    return TournamentSummary(
+        tournamentId=tournament.tournamentId,
+        name=tournament.name,
+        createdAt=tournament.createdAt,
+        status=tournament.status,
+        round=tournament.round,
+        entrants=len(tournament.entrants),
+        tables=[TournamentTable(players=players[game_id], finished=game_id in finished)
+                for game_id in tournament.tables],
+        champions=[tournament.entrants[token].displayName for token in tournament.champions],
+    )
+
+@router.get("/tournaments/{tournament_id}/entrants/{token}", response_model=TournamentEntrant)
+async def get_entrant(tournament_id: str, token: str):
+    """
+    Returns the game and player ID an entrant plays as in the current round.
+    """
+    tournament = _load_tournament(get_valkey_client(), tournament_id)
+    if token not in tournament.entrants:
+        raise HTTPException(status_code=404, detail="Unknown join token.")
+    return tournament.entrants[token]
+
+@router.post("/tournaments/{tournament_id}/advance", response_model=TournamentState)
+async def advance_tournament(tournament_id: str, request: AdvanceTournamentRequest):
+    """
+    Seats the winners of the current round at new tables, or crowns them if the
+    round was played at a single table (or too few players won to fill one).
+    """
+    db_client = get_valkey_client()
+    tournament = _load_tournament(db_client, tournament_id)
+    if tournament.organizerId != request.organizer_id:
+        raise HTTPException(status_code=403, detail="Only the organizer can advance the tournament.")
+    if tournament.status == GameStatus.FINISHED:
+        raise HTTPException(status_code=400, detail="Tournament is already finished.")
+
+    results: Dict[str, str] = db_client.hgetall(keys.tournament_results(tournament_id))
+    unfinished = [game_id for game_id in tournament.tables if game_id not in results]
+    if unfinished and not request.force:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{len(unfinished)} of {len(tournament.tables)} tables have not finished round {tournament.round}."
+        )
+
+    token_by_seat = {(e.gameId, e.playerId): token for token, e in tournament.entrants.items()}
+    winners = [token_by_seat[(game_id, player_id)]
+               for game_id in tournament.tables if game_id in results
+               for player_id in json.loads(results[game_id])
+               if (game_id, player_id) in token_by_seat]
+    for entrant in tournament.entrants.values():
+        entrant.gameId = entrant.playerId = None
+
+    games = []
+    if len(tournament.tables) == 1 or len(winners) < MIN_TABLE_SIZE:
+        tournament.status = GameStatus.FINISHED
+        tournament.champions = winners
+        tournament.tables = []
+    else:
+        seated, tables = _next_round(winners)
+        tournament.round += 1
+        games = _seat_tables(tournament, seated, tables)
+
+    _save_tournament(db_client, tournament, games)
+    logger.info(f"Tournament {tournament_id} advanced to round {tournament.round} with {len(games)} table(s)")
+    return tournament